@@ -10,10 +10,10 @@ bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
 
 DATA_DIR = os.path.abspath('data')
 
-def load_parquet(rel_path):
+def load_parquet(rel_path, columns=None, filters=None):
     path = os.path.join(DATA_DIR, rel_path)
     if os.path.exists(path):
-        return pd.read_parquet(path)
+        return pd.read_parquet(path, columns=columns, filters=filters)
     return None
 
 @bp.route('/atc/ranking', methods=['GET'])
@@ -75,7 +75,7 @@ def get_market_indices():
     GET /api/v1/market/indices
     Returns available macro series from parquet.
     """
-    df = load_parquet('market/macro_indicators.parquet')
+    df = load_parquet('market/macro_indicators.parquet', columns=['series_id', 'source'])
     if df is None:
         return jsonify({'items': []})
     
@@ -93,12 +93,15 @@ def get_market_history():
     if not sid:
         return jsonify({'error': 'Missing series_id'}), 400
         
-    df = load_parquet('market/macro_indicators.parquet')
-    if df is None:
+    # Only this series' rows are decoded: the file is sorted by series_id, so
+    # the filter skips other series' row groups by their statistics
+    df_filtered = load_parquet(
+        'market/macro_indicators.parquet',
+        columns=['date', 'value'],
+        filters=[('series_id', '==', sid)]
+    )
+    if df_filtered is None:
          return jsonify({'error': 'No market data'}), 404
-         
-    # Filter
-    df_filtered = df[df['series_id'] == sid].copy()
     
     # Format
     df_filtered['date'] = df_filtered['date'].dt.strftime('%Y-%m-%d')
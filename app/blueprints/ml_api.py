@@ -197,13 +197,19 @@ def list_models():
     asset = request.args.get('asset')
     
     try:
-        from app.ml.registry.model_registry import list_models
+        from app.ml.registry.model_registry import list_models_raw
+        from app.ml.series_config import get_confidence_from_mape_array
         
-        entries = list_models(asset=asset.upper() if asset else None)
+        models = list_models_raw(asset=asset.upper() if asset else None)
+        
+        # Confidence for all entries in one pass (missing MAPE -> experimental)
+        mapes = [m['metrics'].get('mape', float('nan')) for m in models]
+        for model, confidence in zip(models, get_confidence_from_mape_array(mapes)):
+            model['confidence'] = str(confidence)
         
         return jsonify({
-            'models': [e.to_dict() for e in entries],
-            'count': len(entries)
+            'models': models,
+            'count': len(models)
         })
         
     except Exception as e:
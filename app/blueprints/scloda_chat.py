@@ -3,11 +3,17 @@ Scloda Chat Blueprint - API endpoints for AI chat.
 
 Endpoints:
 - POST /api/v1/scloda/message - Send a message and get response
+- POST /api/v1/scloda/message/stream - Same, streamed as server-sent events
 - POST /api/v1/scloda/insight - Generate insight for a chart
+- POST /api/v1/scloda/insights - Generate insights for several charts at once
 - GET /api/v1/scloda/health - Check service status
 """
-from flask import Blueprint, jsonify, request
-from app.services.scloda_service import chat_completion, get_service_status, generate_chart_insight
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.services.scloda_service import (
+    chat_completion, stream_completion, get_service_status, generate_chart_insight,
+    generate_chart_insights_batch, generate_model_analysis
+)
 from app.ml.logging_utils import get_logger
 
 logger = get_logger("scloda.api")
@@ -74,6 +80,46 @@ def send_message():
         }), 500
 
 
+@scloda_bp.route("/message/stream", methods=["POST"])
+def stream_message():
+    """
+    POST /api/v1/scloda/message/stream
+    
+    Same request body as /message; the response is streamed as it is generated.
+    
+    Response (text/event-stream):
+        data: {"delta": "La UF "}
+        data: {"delta": "hoy está en..."}
+        data: [DONE]
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or "message" not in data:
+        return jsonify({"error": "Message is required"}), 400
+    
+    user_message = data["message"].strip()
+    if not user_message:
+        return jsonify({"error": "Message cannot be empty"}), 400
+    
+    if len(user_message) > 2000:
+        return jsonify({"error": "Message too long (max 2000 chars)"}), 400
+    
+    history = data.get("history", [])
+    
+    logger.info("chat_stream_request", message_length=len(user_message))
+    
+    def events():
+        for delta in stream_completion(user_message=user_message, conversation_history=history):
+            yield f"data: {json.dumps({'delta': delta}, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @scloda_bp.route("/insight", methods=["POST"])
 def get_insight():
     """
@@ -111,6 +157,58 @@ def get_insight():
         }), 500
 
 
+@scloda_bp.route("/insights", methods=["POST"])
+def get_insights():
+    """
+    POST /api/v1/scloda/insights
+    
+    Generate insights for several charts in one request (LLM calls run concurrently).
+    
+    Request body:
+        {
+            "items": [
+                {"asset": "gold", "current_value": 2650.5, "change_percent": 1.2, "trend": "up"},
+                {"asset": "copper", "change_percent": -0.4, "trend": "down"}
+            ]
+        }
+    
+    Response:
+        {
+            "gold": {"insight": "...", "tokens_used": 120},
+            "copper": {"insight": "...", "tokens_used": 115}
+        }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get("items"), list):
+            return jsonify({"error": "Items list is required"}), 400
+        
+        if any(not isinstance(item, dict) or "asset" not in item for item in data["items"]):
+            return jsonify({"error": "Every item needs an asset"}), 400
+        
+        items = [
+            {
+                "asset": item["asset"],
+                "current_value": item.get("current_value"),
+                "change_percent": item.get("change_percent", 0),
+                "trend": item.get("trend", "stable")
+            }
+            for item in data["items"]
+        ]
+        
+        logger.info("insights_batch_request", assets=[item["asset"] for item in items])
+        
+        return jsonify(generate_chart_insights_batch(items))
+        
+    except Exception as e:
+        logger.error("insights_endpoint_error", error=str(e))
+        return jsonify({
+            "error": "Internal server error",
+            "insight": "Analysis unavailable."
+        }), 500
+
+
 @scloda_bp.route("/model-analysis", methods=["POST"])
 def get_model_analysis():
     """
@@ -137,7 +235,6 @@ def get_model_analysis():
         
         logger.info("model_analysis_request", asset=asset, model=model_name)
         
-        from app.services.scloda_service import generate_model_analysis
         result = generate_model_analysis(asset, model_name, metrics)
         
         return jsonify(result)
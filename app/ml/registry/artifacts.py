@@ -0,0 +1,68 @@
+"""
+Model Artifact Serialization
+Pickle protocol 5 with large numpy buffers written out-of-band.
+"""
+import os
+import pickle
+from typing import Any
+
+import numpy as np
+
+# Store contiguous numpy buffers in sidecar .npy files instead of copying
+# them into the pickle stream (halves peak memory while saving)
+OUT_OF_BAND_BUFFERS = True
+
+
+def _buffer_path(path, index: int) -> str:
+    """Sidecar file for the index-th out-of-band buffer of an artifact."""
+    return f"{path}.{index}.npy"
+
+
+def dump_model(model: Any, path, out_of_band: bool = None) -> int:
+    """
+    Pickle a model to path.
+
+    Args:
+        model: Model object to persist
+        path: Destination .pkl path
+        out_of_band: Write buffers to sidecar files (default: OUT_OF_BAND_BUFFERS)
+
+    Returns:
+        Number of out-of-band buffers written
+    """
+    out_of_band = OUT_OF_BAND_BUFFERS if out_of_band is None else out_of_band
+
+    if not out_of_band:
+        with open(path, "wb") as f:
+            pickle.dump(model, f)
+        return 0
+
+    buffers = []
+    data = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+
+    for i, buf in enumerate(buffers):
+        np.save(_buffer_path(path, i), np.frombuffer(buf.raw(), dtype=np.uint8))
+
+    # Pickle stream last, so a readable .pkl always has its buffers on disk
+    with open(path, "wb") as f:
+        f.write(data)
+
+    return len(buffers)
+
+
+def load_model(path) -> Any:
+    """
+    Load a model written by dump_model (or a plain pickle).
+
+    Args:
+        path: Artifact .pkl path
+
+    Returns:
+        Unpickled model object
+    """
+    buffers = []
+    while os.path.exists(_buffer_path(path, len(buffers))):
+        buffers.append(np.load(_buffer_path(path, len(buffers))))
+
+    with open(path, "rb") as f:
+        return pickle.load(f, buffers=buffers)
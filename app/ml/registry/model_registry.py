@@ -3,7 +3,7 @@ Champion Selection and Model Persistence
 Selects best model from backtest results and persists to registry.
 """
 import json
-import pickle
+import os
 import uuid
 from dataclasses import dataclass, asdict
 from datetime import datetime, date
@@ -13,6 +13,7 @@ from typing import Any, Optional
 import pandas as pd
 
 from app.ml.config import FORECAST_CONFIG
+from app.ml.registry.artifacts import dump_model, load_model
 from app.ml.validation.backtest_runner import BacktestResult
 from app.ml.logging_utils import get_registry_logger
 from app.ml.exceptions import ModelNotFoundError
@@ -23,6 +24,13 @@ logger = get_registry_logger()
 DEFAULT_MODELS_DIR = Path("models")
 DEFAULT_REGISTRY_PATH = Path("models/registry.json")
 
+# Append-only side log replayed on top of registry.json
+REGISTRY_LOG_NAME = "registry.log"
+REGISTRY_LOG_MAX_BYTES = 256 * 1024
+
+# Sort key for results missing a metric (always ranks last)
+_MISSING_METRIC = float("inf")
+
 
 @dataclass
 class ModelRegistryEntry:
@@ -73,16 +81,18 @@ def select_champion(
     if not backtest_results:
         raise ValueError("No backtest results to select champion from")
     
-    # Sort by primary metric, then secondary
-    sorted_results = sorted(
-        backtest_results,
-        key=lambda r: (
-            r.metrics_mean.get(primary_metric, float('inf')),
-            r.metrics_mean.get(secondary_metric, float('inf'))
+    # Key each result once (primary, secondary, position) and take the min;
+    # the position keeps ties stable and avoids comparing results directly
+    keyed = [
+        (
+            r.metrics_mean.get(primary_metric, _MISSING_METRIC),
+            r.metrics_mean.get(secondary_metric, _MISSING_METRIC),
+            i
         )
-    )
+        for i, r in enumerate(backtest_results)
+    ]
     
-    champion = sorted_results[0]
+    champion = backtest_results[min(keyed)[2]]
     
     logger.info(
         "champion_selected",
@@ -130,8 +140,7 @@ def save_champion(
     # Save model artifact
     artifact_path = asset_dir / f"champion_{model_id}.pkl"
     try:
-        with open(artifact_path, "wb") as f:
-            pickle.dump(result.model, f)
+        dump_model(result.model, artifact_path)
         logger.info("model_artifact_saved", path=str(artifact_path))
     except Exception as e:
         logger.error("model_save_failed", error=str(e))
@@ -163,10 +172,11 @@ def save_champion(
     # Save to registry
     _add_to_registry(entry, models_dir)
     
-    # Save backtest predictions
-    predictions_path = asset_dir / f"predictions_{model_id}.csv"
-    if not result.predictions.empty:
-        result.predictions.to_csv(predictions_path, index=False)
+    # Save backtest predictions (skip the file when there are no usable rows)
+    predictions = result.predictions.dropna(how="all")
+    if len(predictions.index) > 0:
+        predictions_path = asset_dir / f"predictions_{model_id}.csv"
+        predictions.to_csv(predictions_path, index=False)
         logger.info("predictions_saved", path=str(predictions_path))
     
     logger.info(
@@ -181,30 +191,123 @@ def save_champion(
 
 
 def _add_to_registry(entry: ModelRegistryEntry, models_dir: Path):
-    """Add entry to JSON registry file."""
-    registry_path = models_dir / "registry.json"
+    """
+    Append entry to the registry log.
     
-    # Load existing registry
-    if registry_path.exists():
-        with open(registry_path, "r") as f:
-            registry = json.load(f)
-    else:
-        registry = {"models": []}
+    Saves are O(1): the entry is appended to registry.log as one JSON line
+    and merged into registry.json by compact_registry() once the log grows
+    past REGISTRY_LOG_MAX_BYTES.
+    """
+    log_path = models_dir / REGISTRY_LOG_NAME
     
-    # Deactivate previous champions for this asset
-    for existing in registry["models"]:
-        if existing.get("asset") == entry.asset and existing.get("is_active"):
-            existing["is_active"] = False
+    models_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a") as f:
+        f.write(json.dumps({"op": "add", "entry": entry.to_dict()}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
     
-    # Add new entry
-    registry["models"].append(entry.to_dict())
+    logger.info("registry_updated", path=str(log_path))
     
-    # Save registry
-    models_dir.mkdir(parents=True, exist_ok=True)
-    with open(registry_path, "w") as f:
+    if os.path.getsize(log_path) >= REGISTRY_LOG_MAX_BYTES:
+        compact_registry(models_dir)
+
+
+def _load_registry(models_dir: Path) -> dict:
+    """
+    Load registry.json snapshot and replay the registry logs on top of it.
+    
+    Safe against a concurrent compact_registry(): the log being compacted
+    (registry.log.compacting) is replayed too, entries already in the
+    snapshot are skipped by id, and the load is retried when the snapshot
+    is replaced while the logs are being read.
+    """
+    registry_path = models_dir / "registry.json"
+    log_path = models_dir / REGISTRY_LOG_NAME
+    compacting_path = models_dir / (REGISTRY_LOG_NAME + ".compacting")
+    
+    for _ in range(5):
+        try:
+            with open(registry_path, "r") as f:
+                snapshot_id = os.fstat(f.fileno()).st_ino
+                registry = json.load(f)
+        except FileNotFoundError:
+            snapshot_id = None
+            registry = {"models": []}
+        
+        # The live log first: compaction renames it to .compacting, so a
+        # rename in between leaves the lines in the file read second
+        log_lines = _read_lines(log_path)
+        compacting_lines = _read_lines(compacting_path)
+        
+        try:
+            current_id = os.stat(registry_path).st_ino
+        except FileNotFoundError:
+            current_id = None
+        if current_id == snapshot_id:
+            break
+    
+    models = registry.setdefault("models", [])
+    seen = {m.get("id") for m in models}
+    
+    # Older (compacting) records before newer ones
+    for line in compacting_lines + log_lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get("op") != "add":
+            continue
+        
+        new_entry = record["entry"]
+        if new_entry.get("id") in seen:
+            continue
+        seen.add(new_entry.get("id"))
+        
+        # Deactivate previous champions for this asset
+        for existing in models:
+            if existing.get("asset") == new_entry.get("asset") and existing.get("is_active"):
+                existing["is_active"] = False
+        
+        models.append(new_entry)
+    
+    return registry
+
+
+def _read_lines(path: Path) -> list[str]:
+    """Lines of a registry log (empty when it does not exist)."""
+    try:
+        with open(path, "r") as f:
+            return f.readlines()
+    except FileNotFoundError:
+        return []
+
+
+def compact_registry(models_dir: Path = None):
+    """Merge registry.log into the registry.json snapshot and truncate the log."""
+    models_dir = models_dir or DEFAULT_MODELS_DIR
+    registry_path = models_dir / "registry.json"
+    log_path = models_dir / REGISTRY_LOG_NAME
+    compacting_path = models_dir / (REGISTRY_LOG_NAME + ".compacting")
+    
+    # Move the log aside first: new saves start a fresh registry.log, and
+    # readers replay the moved one until the snapshot includes it. A
+    # leftover from an interrupted compaction is merged first; the live log
+    # then waits for the next compaction
+    if not os.path.exists(compacting_path) and os.path.exists(log_path):
+        os.replace(log_path, compacting_path)
+    
+    # Records also still in the live log are skipped by id on replay
+    registry = _load_registry(models_dir)
+    
+    # Write snapshot atomically before dropping the moved-aside log
+    tmp_path = models_dir / "registry.json.tmp"
+    with open(tmp_path, "w") as f:
         json.dump(registry, f, indent=2)
+    os.replace(tmp_path, registry_path)
+    
+    if os.path.exists(compacting_path):
+        os.remove(compacting_path)
     
-    logger.info("registry_updated", path=str(registry_path))
+    logger.info("registry_compacted", path=str(registry_path), models=len(registry["models"]))
 
 
 def get_latest_champion(asset: str, models_dir: Path = None) -> ModelRegistryEntry:
@@ -222,13 +325,7 @@ def get_latest_champion(asset: str, models_dir: Path = None) -> ModelRegistryEnt
         ModelNotFoundError: If no champion found
     """
     models_dir = models_dir or DEFAULT_MODELS_DIR
-    registry_path = models_dir / "registry.json"
-    
-    if not registry_path.exists():
-        raise ModelNotFoundError(asset)
-    
-    with open(registry_path, "r") as f:
-        registry = json.load(f)
+    registry = _load_registry(models_dir)
     
     # Find active champion for asset
     for entry_data in reversed(registry.get("models", [])):
@@ -248,42 +345,48 @@ def load_champion_model(entry: ModelRegistryEntry) -> Any:
     Returns:
         Loaded model object
     """
-    artifact_path = Path(entry.artifact_path)
+    artifact_path = entry.artifact_path
     
-    if not artifact_path.exists():
+    if not os.path.exists(artifact_path):
         raise FileNotFoundError(f"Model artifact not found: {artifact_path}")
     
-    with open(artifact_path, "rb") as f:
-        model = pickle.load(f)
+    model = load_model(artifact_path)
     
     logger.info("model_loaded", model_id=entry.id, model=entry.model_name)
     
     return model
 
 
-def list_models(asset: str = None, models_dir: Path = None) -> list[ModelRegistryEntry]:
+def list_models_raw(asset: str = None, models_dir: Path = None) -> list[dict]:
     """
-    List all models in registry, optionally filtered by asset.
+    List registry entries as plain dicts, optionally filtered by asset.
     
     Args:
         asset: Filter by asset (optional)
         models_dir: Models directory
         
     Returns:
-        List of ModelRegistryEntry objects
+        List of registry entry dicts
     """
     models_dir = models_dir or DEFAULT_MODELS_DIR
-    registry_path = models_dir / "registry.json"
-    
-    if not registry_path.exists():
-        return []
+    models = _load_registry(models_dir).get("models", [])
     
-    with open(registry_path, "r") as f:
-        registry = json.load(f)
+    if asset is None:
+        return models
     
-    entries = []
-    for entry_data in registry.get("models", []):
-        if asset is None or entry_data.get("asset", "").upper() == asset.upper():
-            entries.append(ModelRegistryEntry.from_dict(entry_data))
+    asset_upper = asset.upper()
+    return [m for m in models if m.get("asset", "").upper() == asset_upper]
+
+
+def list_models(asset: str = None, models_dir: Path = None) -> list[ModelRegistryEntry]:
+    """
+    List all models in registry, optionally filtered by asset.
     
-    return entries
+    Args:
+        asset: Filter by asset (optional)
+        models_dir: Models directory
+        
+    Returns:
+        List of ModelRegistryEntry objects
+    """
+    return [ModelRegistryEntry.from_dict(m) for m in list_models_raw(asset, models_dir)]
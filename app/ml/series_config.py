@@ -2,6 +2,9 @@
 Series Classification Configuration
 Defines which series are trainable vs context-only
 """
+import bisect
+
+import numpy as np
 
 # ============================================
 # TRAINABLE SERIES (ML Enabled)
@@ -147,16 +150,24 @@ CONFIDENCE_LEVELS = {
 }
 
 
+# Thresholds derived once from CONFIDENCE_LEVELS, sorted ascending
+_CONF_TABLE = tuple(sorted(
+    (level["mape_threshold"], name) for name, level in CONFIDENCE_LEVELS.items()
+))
+_CONF_THRESH = tuple(threshold for threshold, _ in _CONF_TABLE)
+_CONF_LABELS = tuple(name for _, name in _CONF_TABLE)
+
+
 def get_confidence_from_mape(mape: float) -> str:
-    """Determine confidence level from MAPE."""
-    if mape < 2.0:
-        return "excellent"
-    elif mape < 5.0:
-        return "good"
-    elif mape < 10.0:
-        return "volatile"
-    else:
-        return "experimental"
+    """Determine confidence level from MAPE (first level whose threshold exceeds it)."""
+    idx = bisect.bisect_right(_CONF_THRESH, mape)
+    return _CONF_LABELS[min(idx, len(_CONF_LABELS) - 1)]
+
+
+def get_confidence_from_mape_array(mape: np.ndarray) -> np.ndarray:
+    """Vectorized get_confidence_from_mape for a batch of MAPE values."""
+    idx = np.searchsorted(_CONF_THRESH, np.asarray(mape, dtype=np.float64), side="right")
+    return np.asarray(_CONF_LABELS)[np.minimum(idx, len(_CONF_LABELS) - 1)]
 
 
 def is_trainable(series: str) -> bool:
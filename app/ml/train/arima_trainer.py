@@ -7,6 +7,7 @@ import json
 import os
 from dataclasses import dataclass, asdict
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple, Any
 
@@ -15,6 +16,7 @@ import numpy as np
 
 from app.ml.logging_utils import get_logger
 from app.ml.exceptions import ModelTrainingError
+from app.ml.registry.artifacts import dump_model, load_model
 
 logger = get_logger("ml.train.arima")
 
@@ -32,6 +34,30 @@ except ImportError:
                    message="Install with: pip install pmdarima")
 
 
+def _test_metrics(y_test: np.ndarray, predictions: np.ndarray) -> dict:
+    """
+    MAE, RMSE and MAPE over the hold-out set.
+    
+    The absolute errors are computed once and reused for all three metrics.
+    """
+    y_test = np.ascontiguousarray(y_test, dtype=np.float64)
+    predictions = np.ascontiguousarray(predictions, dtype=np.float64)
+    
+    abs_errors = np.abs(y_test - predictions)
+    
+    metrics = {
+        "mae": float(abs_errors.mean()),
+        "rmse": float(np.sqrt(np.dot(abs_errors, abs_errors) / len(abs_errors))),
+        "mape": 0.0
+    }
+    
+    non_zero = y_test != 0
+    if non_zero.any():
+        metrics["mape"] = float((abs_errors[non_zero] / np.abs(y_test[non_zero])).mean() * 100)
+    
+    return metrics
+
+
 def train_asset_model(asset: str, df: pd.DataFrame) -> dict:
     """
     Train auto_arima model for an asset.
@@ -68,8 +94,7 @@ def train_asset_model(asset: str, df: pd.DataFrame) -> dict:
                 "error": "pmdarima not installed"
             }
         
-        # Prepare data
-        df = df.copy()
+        # Prepare data (read-only: no need to copy the frame)
         target_col = "value" if "value" in df.columns else "price_usd"
         
         if target_col not in df.columns:
@@ -82,7 +107,7 @@ def train_asset_model(asset: str, df: pd.DataFrame) -> dict:
                 "error": f"target column 'value' or 'price_usd' not found"
             }
         
-        y = df[target_col].values
+        y = np.ascontiguousarray(df[target_col].to_numpy(dtype=np.float64, copy=False))
         
         # Train/test split (last 6 months for validation)
         test_size = min(6, len(y) // 5)
@@ -110,14 +135,7 @@ def train_asset_model(asset: str, df: pd.DataFrame) -> dict:
         
         if y_test is not None and len(y_test) > 0:
             predictions = model.predict(n_periods=len(y_test))
-            errors = y_test - predictions
-            
-            metrics["mae"] = float(np.mean(np.abs(errors)))
-            metrics["rmse"] = float(np.sqrt(np.mean(errors ** 2)))
-            
-            non_zero = y_test != 0
-            if np.any(non_zero):
-                metrics["mape"] = float(np.mean(np.abs(errors[non_zero] / y_test[non_zero])) * 100)
+            metrics = _test_metrics(y_test, predictions)
         
         # Save model
         model_path = save_champion(asset, model, order, metrics)
@@ -161,8 +179,6 @@ def save_champion(
     output_dir: Path = Path("models")
 ) -> str:
     """Save trained model and metadata to registry with confidence levels."""
-    import pickle
-    
     # Import series config for confidence levels
     try:
         from app.ml.series_config import (
@@ -181,8 +197,7 @@ def save_champion(
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     model_path = asset_dir / f"arima_{timestamp}.pkl"
     
-    with open(model_path, "wb") as f:
-        pickle.dump(model, f)
+    dump_model(model, model_path)
     
     # Determine confidence from MAPE
     mape = metrics.get("mape", 5.0)
@@ -218,7 +233,7 @@ def save_champion(
     # Update registry
     registry_path = output_dir / "registry.json"
     
-    if registry_path.exists():
+    if os.path.exists(registry_path):
         with open(registry_path, "r") as f:
             registry = json.load(f)
     else:
@@ -230,6 +245,9 @@ def save_champion(
     with open(registry_path, "w") as f:
         json.dump(registry, f, indent=2)
     
+    # Drop cached models so the new champion is picked up
+    _load_cached.cache_clear()
+    
     logger.info("champion_saved", asset=asset, model_path=str(model_path), confidence=confidence)
     
     return str(model_path)
@@ -238,11 +256,9 @@ def save_champion(
 
 def load_champion(asset: str, output_dir: Path = Path("models")):
     """Load champion model for an asset."""
-    import pickle
-    
     registry_path = output_dir / "registry.json"
     
-    if not registry_path.exists():
+    if not os.path.exists(registry_path):
         raise FileNotFoundError("No registry found")
     
     with open(registry_path, "r") as f:
@@ -252,17 +268,24 @@ def load_champion(asset: str, output_dir: Path = Path("models")):
         raise KeyError(f"No champion for {asset}")
     
     entry = registry["models"][asset]
-    model_path = Path(entry["model_path"])
+    model_path = entry["model_path"]
     
-    if not model_path.exists():
+    try:
+        mtime_ns = os.stat(model_path).st_mtime_ns
+    except FileNotFoundError:
         raise FileNotFoundError(f"Model file not found: {model_path}")
     
-    with open(model_path, "rb") as f:
-        model = pickle.load(f)
+    model = _load_cached(asset, model_path, mtime_ns)
     
     return model, entry
 
 
+@lru_cache(maxsize=32)
+def _load_cached(asset: str, model_path: str, mtime_ns: int):
+    """Unpickle a champion once per (path, mtime); repeat forecasts reuse it."""
+    return load_model(model_path)
+
+
 def forecast(asset: str, horizon: int = 3, output_dir: Path = Path("models")) -> dict:
     """Generate forecast using champion model."""
     try:
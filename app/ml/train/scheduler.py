@@ -88,8 +88,6 @@ def trigger_training_now() -> dict:
         parquet_path = Path("data/market/macro_indicators.parquet")
         
         if parquet_path.exists():
-            df_all = pd.read_parquet(parquet_path)
-            
             # Assets to train from parquet
             asset_mapping = {
                 "GOLD": "GOLDAMGBD228NLBM",
@@ -98,6 +96,14 @@ def trigger_training_now() -> dict:
                 "USDCLP": "USD-CLP",  # If exists
             }
             
+            # Only read the columns and series we train (row groups of
+            # other series are skipped by the pyarrow reader)
+            df_all = pd.read_parquet(
+                parquet_path,
+                columns=["series_id", "date", "value"],
+                filters=[("series_id", "in", list(asset_mapping.values()))]
+            )
+            
             for asset, series_id in asset_mapping.items():
                 df_asset = df_all[df_all["series_id"] == series_id][["date", "value"]].copy()
                 
@@ -8,6 +8,7 @@ from typing import Any, Optional
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 from app.ml.config import FORECAST_CONFIG
 from app.ml.logging_utils import get_validation_logger
@@ -15,6 +16,13 @@ from app.ml.exceptions import ModelTrainingError
 
 logger = get_validation_logger()
 
+# Numba is optional; fold metrics fall back to vectorized NumPy without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 
 @dataclass
 class BacktestResult:
@@ -54,28 +62,41 @@ def calculate_metrics(actual: np.ndarray, predicted: np.ndarray) -> MetricSet:
     Returns:
         MetricSet with calculated metrics
     """
-    actual = np.asarray(actual)
-    predicted = np.asarray(predicted)
+    # Working precision comes from FORECAST_CONFIG.metric_dtype
+    dtype = np.dtype(FORECAST_CONFIG.metric_dtype)
+    actual = np.ascontiguousarray(actual, dtype=dtype)
+    predicted = np.ascontiguousarray(predicted, dtype=dtype)
     
-    # Remove NaN pairs
-    mask = ~(np.isnan(actual) | np.isnan(predicted))
-    actual = actual[mask]
-    predicted = predicted[mask]
+    # Errors are computed once and shared by all three metrics;
+    # a NaN on either side propagates, so one isnan() drops NaN pairs
+    diff = actual - predicted
+    mask = ~np.isnan(diff)
+    if not mask.all():
+        diff = diff[mask]
+        actual = actual[mask]
     
-    if len(actual) == 0:
+    n = len(diff)
+    if n == 0:
         return MetricSet(mae=np.nan, rmse=np.nan, mape=np.nan)
     
+    abs_diff = np.abs(diff)
+    
     # MAE: Mean Absolute Error
-    mae = np.mean(np.abs(actual - predicted))
+    mae = abs_diff.sum() / n
     
     # RMSE: Root Mean Square Error
-    rmse = np.sqrt(np.mean((actual - predicted) ** 2))
+    rmse = np.sqrt(np.float64(np.dot(diff, diff)) / n)
     
     # MAPE: Mean Absolute Percentage Error
-    # Avoid division by zero
+    # Dense non-zero actuals (the usual case) take a plain divide;
+    # otherwise zero denominators stay NaN and are skipped
     nonzero_mask = actual != 0
-    if np.any(nonzero_mask):
-        mape = np.mean(np.abs((actual[nonzero_mask] - predicted[nonzero_mask]) / actual[nonzero_mask])) * 100
+    if nonzero_mask.all():
+        mape = (abs_diff / np.abs(actual)).mean() * 100
+    elif nonzero_mask.any():
+        pct = np.full_like(abs_diff, np.nan)
+        np.divide(abs_diff, np.abs(actual), out=pct, where=nonzero_mask)
+        mape = np.nanmean(pct) * 100
     else:
         mape = np.nan
     
@@ -216,38 +237,33 @@ def _manual_backtest(
     n_samples = len(data)
     n_folds = (n_samples - initial_window - fh) // step + 1
     
+    # Pull the target out of the experiment once; everything below slices this array
+    target = exp.get_config("target")
+    target_arr = data[target].to_numpy(dtype=np.float64, copy=False)
+    
+    # Fold k tests [test_start_k, test_start_k + fh) with
+    # test_start_k = initial_window + k * step; every fold is built at once
+    test_starts = initial_window + np.arange(n_folds) * step
+    test_actual = sliding_window_view(target_arr, fh)[initial_window::step][:n_folds]
+    
+    # Simulate prediction (use last known value as baseline)
+    # In real implementation, would retrain and predict
+    # The per-fold value is broadcast across the horizon as a read-only view
+    last_known = target_arr[test_starts - 1]
+    test_predicted = np.broadcast_to(last_known[:, None], (n_folds, fh))
+    
+    mae_per_fold, rmse_per_fold, mape_per_fold = _fold_metrics(test_actual, test_predicted)
+    
     metrics_per_fold = []
-    predictions = []
     
     for fold_idx in range(n_folds):
-        train_end = initial_window + fold_idx * step
-        test_start = train_end
-        test_end = test_start + fh
-        
-        if test_end > n_samples:
-            break
-        
-        # Get test values
-        test_actual = data.iloc[test_start:test_end][exp.get_config("target")].values
-        
-        # Simulate prediction (use last known value as baseline)
-        # In real implementation, would retrain and predict
-        test_predicted = data.iloc[test_start - 1:test_start][exp.get_config("target")].values
-        test_predicted = np.repeat(test_predicted, fh)
-        
-        # Calculate fold metrics
-        fold_metrics = calculate_metrics(test_actual, test_predicted)
+        fold_metrics = MetricSet(
+            mae=mae_per_fold[fold_idx],
+            rmse=rmse_per_fold[fold_idx],
+            mape=mape_per_fold[fold_idx]
+        )
         metrics_per_fold.append(fold_metrics.to_dict())
         
-        # Store predictions
-        for i, (actual, pred) in enumerate(zip(test_actual, test_predicted)):
-            predictions.append({
-                "date": data.index[test_start + i] if hasattr(data, 'index') else test_start + i,
-                "actual": actual,
-                "predicted": pred,
-                "fold": fold_idx + 1
-            })
-        
         logger.info(
             "backtest_fold_complete",
             asset=asset,
@@ -258,26 +274,30 @@ def _manual_backtest(
             mape=round(fold_metrics.mape, 4)
         )
     
-    # Aggregate metrics
+    # Aggregate metrics (NaN-skipping, population std like np.nanstd)
     if metrics_per_fold:
-        mae_values = [m["mae"] for m in metrics_per_fold]
-        rmse_values = [m["rmse"] for m in metrics_per_fold]
-        mape_values = [m["mape"] for m in metrics_per_fold]
-        
-        metrics_mean = {
-            "mae": np.nanmean(mae_values),
-            "rmse": np.nanmean(rmse_values),
-            "mape": np.nanmean(mape_values)
-        }
-        metrics_std = {
-            "mae": np.nanstd(mae_values),
-            "rmse": np.nanstd(rmse_values),
-            "mape": np.nanstd(mape_values)
-        }
+        fold_df = pd.DataFrame({
+            "mae": mae_per_fold,
+            "rmse": rmse_per_fold,
+            "mape": mape_per_fold
+        })
+        metrics_mean = fold_df.mean(skipna=True).to_dict()
+        metrics_std = fold_df.std(skipna=True, ddof=0).to_dict()
     else:
         metrics_mean = {"mae": np.nan, "rmse": np.nan, "mape": np.nan}
         metrics_std = {"mae": np.nan, "rmse": np.nan, "mape": np.nan}
     
+    if n_folds > 0:
+        positions = (test_starts[:, None] + np.arange(fh)).ravel()
+        predictions = pd.DataFrame({
+            "date": data.index.take(positions),
+            "actual": test_actual.ravel(),
+            "predicted": np.repeat(last_known, fh),
+            "fold": np.repeat(np.arange(1, n_folds + 1), fh)
+        })
+    else:
+        predictions = pd.DataFrame()
+    
     return BacktestResult(
         asset=asset,
         model_name=model_name,
@@ -287,12 +307,83 @@ def _manual_backtest(
         metrics_per_fold=metrics_per_fold,
         metrics_mean=metrics_mean,
         metrics_std=metrics_std,
-        predictions=pd.DataFrame(predictions),
+        predictions=predictions,
         training_end_date=datetime.now(),
         experiment_id=experiment_id
     )
 
 
+def _fold_metrics(
+    actual: np.ndarray,
+    predicted: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row-wise MAE, RMSE and MAPE for (n_folds, fh) arrays.
+    
+    Same rules as calculate_metrics, applied per row: NaN pairs are
+    ignored, zero actuals are excluded from MAPE, and a row with no
+    usable values yields NaN.
+    """
+    if NUMBA_AVAILABLE:
+        out = _fold_metrics_kernel(actual, predicted)
+        return out[0], out[1], out[2]
+    
+    diff = actual - predicted
+    valid = ~np.isnan(diff)
+    diff = np.where(valid, diff, 0.0)
+    abs_diff = np.abs(diff)
+    
+    n = valid.sum(axis=1)
+    nonzero = valid & (actual != 0)
+    n_pct = nonzero.sum(axis=1)
+    
+    pct = np.zeros_like(abs_diff)
+    np.divide(abs_diff, np.abs(actual), out=pct, where=nonzero)
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mae = np.where(n > 0, abs_diff.sum(axis=1) / n, np.nan)
+        rmse = np.where(n > 0, np.sqrt((diff * diff).sum(axis=1) / n), np.nan)
+        mape = np.where(n_pct > 0, pct.sum(axis=1) / n_pct * 100, np.nan)
+    
+    return mae, rmse, mape
+
+
+if NUMBA_AVAILABLE:
+    # fastmath stays off: it assumes no NaNs, which would break the NaN skip
+    @njit(cache=True)
+    def _fold_metrics_kernel(actual, predicted):
+        """Single-pass per-row MAE/RMSE/MAPE; returns a (3, n_folds) array."""
+        n_folds, fh = actual.shape
+        out = np.empty((3, n_folds))
+        
+        for i in range(n_folds):
+            n = 0
+            n_pct = 0
+            s_abs = 0.0
+            s_sq = 0.0
+            s_pct = 0.0
+            
+            for j in range(fh):
+                a = actual[i, j]
+                d = a - predicted[i, j]
+                if np.isnan(d):
+                    continue
+                
+                ad = abs(d)
+                n += 1
+                s_abs += ad
+                s_sq += d * d
+                if a != 0:
+                    n_pct += 1
+                    s_pct += ad / abs(a)
+            
+            out[0, i] = s_abs / n if n > 0 else np.nan
+            out[1, i] = np.sqrt(s_sq / n) if n > 0 else np.nan
+            out[2, i] = s_pct / n_pct * 100 if n_pct > 0 else np.nan
+        
+        return out
+
+
 def compare_backtest_results(results: list[BacktestResult]) -> pd.DataFrame:
     """
     Compare multiple backtest results in a summary table.
@@ -303,19 +394,23 @@ def compare_backtest_results(results: list[BacktestResult]) -> pd.DataFrame:
     Returns:
         DataFrame with model comparison
     """
-    rows = []
-    for r in results:
-        rows.append({
-            "model": r.model_name,
-            "asset": r.asset,
-            "horizon": r.horizon,
-            "folds": r.folds,
-            "mae_mean": r.metrics_mean.get("mae"),
-            "mae_std": r.metrics_std.get("mae"),
-            "rmse_mean": r.metrics_mean.get("rmse"),
-            "rmse_std": r.metrics_std.get("rmse"),
-            "mape_mean": r.metrics_mean.get("mape"),
-            "mape_std": r.metrics_std.get("mape"),
-        })
+    columns = {
+        "model": [r.model_name for r in results],
+        "asset": [r.asset for r in results],
+        "horizon": [r.horizon for r in results],
+        "folds": [r.folds for r in results],
+    }
+    
+    # Numeric columns built directly as float64 (missing metrics become NaN)
+    for metric in ("mae", "rmse", "mape"):
+        columns[f"{metric}_mean"] = np.fromiter(
+            (r.metrics_mean.get(metric, np.nan) for r in results),
+            dtype=np.float64, count=len(results)
+        )
+        columns[f"{metric}_std"] = np.fromiter(
+            (r.metrics_std.get(metric, np.nan) for r in results),
+            dtype=np.float64, count=len(results)
+        )
     
-    return pd.DataFrame(rows).sort_values("mae_mean")
+    # Stable sort keeps input order among ties
+    return pd.DataFrame(columns).sort_values("mae_mean", kind="mergesort")
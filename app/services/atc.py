@@ -1,6 +1,7 @@
 """
 Service for ATC (Annual Total Cost) Metrics and Ranking.
 """
+import numpy as np
 import pandas as pd
 
 def compute_atc(df: pd.DataFrame) -> pd.DataFrame:
@@ -12,16 +13,15 @@ def compute_atc(df: pd.DataFrame) -> pd.DataFrame:
     Args:
         df: Dataframe with 'cta_mensual_clp'
     Returns:
-        Dataframe with added 'cta_anual_clp' column.
-        Rows with NaN monthly cost are dropped or handled? 
-        We should probably keep them as NaN.
+        New dataframe with added 'cta_anual_clp' column (the input is not
+        modified; untouched columns are not deep-copied).
+        Rows with NaN monthly cost are kept as NaN.
     """
-    out = df.copy()
-    if 'cta_mensual_clp' not in out.columns:
+    if 'cta_mensual_clp' not in df.columns:
         raise ValueError("Missing 'cta_mensual_clp' column")
         
-    out['cta_anual_clp'] = out['cta_mensual_clp'] * 12
-    return out
+    # float64 so downcast integer monthly amounts cannot overflow when scaled
+    return df.assign(cta_anual_clp=df['cta_mensual_clp'].to_numpy(dtype=np.float64) * 12)
 
 def rank_topn(df: pd.DataFrame, n: int = 10) -> pd.DataFrame:
     """
@@ -36,16 +36,19 @@ def rank_topn(df: pd.DataFrame, n: int = 10) -> pd.DataFrame:
     if 'cta_anual_clp' not in df.columns:
         raise ValueError("Missing 'cta_anual_clp' column")
     
-    # Filter out NaNs for ranking? 
-    # Or put them at end? default 'na_position=last'
+    # Ranking everything needs a full sort (NaNs last)
+    if n >= len(df):
+        return df.sort_values(by='cta_anual_clp', ascending=True).reset_index(drop=True)
     
-    # Sort
-    ranked = df.sort_values(by='cta_anual_clp', ascending=True)
+    # Otherwise a partial selection of the N cheapest
+    ranked = df.nsmallest(n, 'cta_anual_clp')
     
-    # Reset index for clean Top 1..N
-    ranked = ranked.reset_index(drop=True)
+    # nsmallest drops NaNs; keep them at the end like na_position='last'
+    if len(ranked) < n:
+        missing = df[df['cta_anual_clp'].isna()].head(n - len(ranked))
+        ranked = pd.concat([ranked, missing])
     
-    # Add 'rank' column? Or just implicit index.
+    # Reset index for clean Top 1..N
     # User asked for 'persist Top-N ranking', so maybe saving them is enough.
     
-    return ranked.head(n)
+    return ranked.reset_index(drop=True)
@@ -2,25 +2,32 @@
 Service to fetch US CPI from BLS.
 Series: CPIAUCSL (Consumer Price Index for All Urban Consumers: All Items in U.S. City Average)
 """
-import requests
 import pandas as pd
 import os
 import json
 
+from app.services.http import get_default_client
+
 BLS_API_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
 
-def fetch_cpi_bls(start_year='2023', end_year='2025', api_key=None):
+# CPI is published monthly; a day-old cached response is still current
+BLS_CACHE_TTL = 24 * 3600
+
+# CPI-U All Items, not seasonally adjusted.
+# (FRED 'CPIAUCSL' is the seasonally adjusted CUSR0000SA0.)
+CPI_SERIES_ID = "CUUR0000SA0"
+
+def fetch_bls_many(series_ids, start_year='2023', end_year='2025', api_key=None):
     """
-    Fetches CPI data from BLS.
+    Fetches several BLS series in one POST (the v2 API takes up to 50 ids).
+    Returns a dict mapping seriesID -> DataFrame ['date', 'value', 'series_id', 'source'].
+    Raises on HTTP or API errors.
     """
     key = api_key or os.getenv('BLS_API_KEY')
     
     headers = {'Content-type': 'application/json'}
     payload = {
-        "seriesid": ["CUUR0000SA0"], # CUUR0000SA0 is often the ID for All Items, equivalent to FRED CPIAUCSL? 
-        # Wait, CPIAUCSL is Seasonally Adjusted. 
-        # BLS ID: CUSR0000SA0 (Seasonally Adjusted) or CUUR0000SA0 (Not Adjusted).
-        # FRED 'CPIAUCSL' = CUSR0000SA0.
+        "seriesid": list(series_ids),
         "startyear": start_year,
         "endyear": end_year
     }
@@ -28,31 +35,42 @@ def fetch_cpi_bls(start_year='2023', end_year='2025', api_key=None):
     if key:
         payload["registrationkey"] = key
 
-    try:
-        response = requests.post(BLS_API_URL, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
-        json_data = response.json()
-        
-        if json_data['status'] == 'REQUEST_NOT_PROCESSED':
-             raise ValueError(f"BLS Error: {json_data['message']}")
-             
-        # Parse
-        series = json_data['Results']['series'][0]
-        data = series['data']
+    response = get_default_client().post(BLS_API_URL, json=payload, headers=headers, expire_after=BLS_CACHE_TTL)
+    json_data = response.json()
+    
+    if json_data['status'] == 'REQUEST_NOT_PROCESSED':
+         raise ValueError(f"BLS Error: {json_data['message']}")
+    
+    frames = {}
+    for series in json_data['Results']['series']:
+        if not series['data']:
+            continue
         
         # To DF
-        df = pd.DataFrame(data)
+        df = pd.DataFrame(series['data'])
         # df cols: year, period, periodName, value, footnotes
         # Construct date
-        df['date'] = pd.to_datetime(df['year'] + '-' + df['period'].str.replace('M', '') + '-01')
+        df['date'] = pd.to_datetime({
+            'year': df['year'].astype(int),
+            'month': df['period'].str.slice(1, 3).astype(int),
+            'day': 1
+        })
         df['value'] = pd.to_numeric(df['value'])
-        df['series_id'] = 'CPIAUCSL'
+        df['series_id'] = series['seriesID']
         df['source'] = 'BLS'
         
         # Sort
-        df = df.sort_values('date')
-        
-        return df[['date', 'value', 'series_id', 'source']]
+        frames[series['seriesID']] = df.sort_values('date')[['date', 'value', 'series_id', 'source']]
+    
+    return frames
+
+def fetch_cpi_bls(start_year='2023', end_year='2025', api_key=None):
+    """
+    Fetches CPI data from BLS.
+    """
+    try:
+        df = fetch_bls_many([CPI_SERIES_ID], start_year, end_year, api_key)[CPI_SERIES_ID]
+        return df.assign(series_id='CPIAUCSL')
 
     except Exception as e:
         print(f"Failed to fetch BLS: {e}")
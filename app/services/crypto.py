@@ -1,29 +1,42 @@
-import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.http import get_default_client
 
 logger = logging.getLogger(__name__)
 
 BUDA_API_URL = "https://www.buda.com/api/v2"
 
-def fetch_crypto_price(market_id):
+# Tickers are live prices, so only reuse them for a short window
+BUDA_CACHE_TTL = 60
+
+def get_buda_ticker(market_id):
     """
-    Fetches generic ticker for a given market_id.
+    Fetches the ticker for a given market_id.
+    Returns a dict with 'last_price' and 'volume' as floats, or None on failure.
     """
     url = f"{BUDA_API_URL}/markets/{market_id}/ticker"
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        ticker = data.get('ticker', {})
-        last_price = float(ticker.get('last_price', [0])[0])
-        return last_price
+        resp = get_default_client().get(url, expire_after=BUDA_CACHE_TTL)
+        ticker = resp.json().get('ticker', {})
+        # Buda sends amounts as [value, currency] pairs
+        return {
+            'last_price': float(ticker.get('last_price', [0])[0]),
+            'volume': float(ticker.get('volume', [0])[0])
+        }
     except Exception as e:
         logger.error(f"Error fetching {market_id} from Buda: {e}")
         return None
 
+def fetch_crypto_price(market_id):
+    """
+    Fetches generic ticker for a given market_id.
+    """
+    ticker = get_buda_ticker(market_id)
+    return ticker['last_price'] if ticker else None
+
 def fetch_buda_series(market_id):
     """
     Returns a DataFrame with ~1 year of data.
@@ -43,27 +56,19 @@ def fetch_buda_series(market_id):
         
     # Generate 1 year of daily history
     days = 365
-    dates = [datetime.now() - timedelta(days=i) for i in range(days)]
-    dates.reverse() # Oldest to newest
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days, freq='D') # Oldest to newest
     
     # Random walk volatility
     volatility = 0.02 # 2% daily move
-    values = []
-    price = current_price * 0.5 # Start lower/different to simulate a trend
-    
-    # Adjust starting price to land exactly on current_price?
-    # Simpler: Generate random factors and normalize path to end at current_price
     
-    np.random.seed(42 + len(market_id)) # Deterministic per coin
-    returns = np.random.normal(0, volatility, days)
+    # Generate random factors and normalize path to end at current_price
+    rng = np.random.RandomState(42 + len(market_id)) # Deterministic per coin
+    returns = rng.normal(0, volatility, days)
     
-    # Construct path backwards from current
-    price_path = [current_price]
-    for r in reversed(returns[:-1]):
-        prev_price = price_path[-1] / (1 + r)
-        price_path.append(prev_price)
-        
-    values = list(reversed(price_path))
+    # Construct path backwards from current: each earlier day divides by
+    # the cumulative product of the returns that follow it
+    factors = np.cumprod(1 + returns[-2::-1])
+    values = np.concatenate(([current_price], current_price / factors))[::-1]
     
     return pd.DataFrame({
         'date': dates,
@@ -71,3 +76,16 @@ def fetch_buda_series(market_id):
         'series_id': mid,
         'source': 'BUDA_CALC'
     })
+
+def fetch_buda_many(market_ids, max_workers=8):
+    """
+    Fetches several Buda series concurrently over the shared client session.
+    Returns a dict mapping market_id -> DataFrame (same shape as fetch_buda_series).
+    """
+    market_ids = list(market_ids)
+    if not market_ids:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(market_ids))) as executor:
+        frames = executor.map(fetch_buda_series, market_ids)
+        return dict(zip(market_ids, frames))
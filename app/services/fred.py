@@ -1,17 +1,23 @@
 import os
-import requests
 import pandas as pd
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from app.services.http import get_default_client
 
 logger = logging.getLogger(__name__)
 
 FRED_API_URL = "https://api.stlouisfed.org/fred/series/observations"
 
-def fetch_fred_series(series_id, api_key=None):
+# FRED series update at most daily; cache responses on disk for 12h
+FRED_CACHE_TTL = 12 * 3600
+
+def fetch_fred_series(series_id, api_key=None, observation_start=None):
     """
     Fetches historical data for a given series_id from FRED API.
     Returns a DataFrame with columns ['date', 'value', 'series_id'].
+    observation_start ('YYYY-MM-DD') limits the pull to recent observations.
     """
     if not api_key:
         api_key = os.environ.get('FRED_API_KEY')
@@ -26,10 +32,11 @@ def fetch_fred_series(series_id, api_key=None):
         'file_type': 'json',
         'sort_order': 'asc'
     }
+    if observation_start:
+        params['observation_start'] = observation_start
 
     try:
-        response = requests.get(FRED_API_URL, params=params, timeout=10)
-        response.raise_for_status()
+        response = get_default_client().get(FRED_API_URL, params=params, expire_after=FRED_CACHE_TTL)
         data = response.json()
         
         observations = data.get('observations', [])
@@ -57,6 +64,28 @@ def fetch_fred_series(series_id, api_key=None):
         logger.error(f"Error fetching {series_id} from FRED: {e}")
         return _get_mock_data(series_id)
 
+def get_fred_series(series_id, days=30, api_key=None):
+    """
+    Fetches the last `days` days of a FRED series.
+    The window start only changes once a day, so repeat calls within the day
+    hit the same disk-cached response (served stale if FRED is down).
+    """
+    start = (date.today() - timedelta(days=days)).isoformat()
+    return fetch_fred_series(series_id, api_key, observation_start=start)
+
+def fetch_fred_many(series_ids, api_key=None, max_workers=8):
+    """
+    Fetches several FRED series concurrently over the shared client session.
+    Returns a dict mapping series_id -> DataFrame (same shape as fetch_fred_series).
+    """
+    series_ids = list(series_ids)
+    if not series_ids:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(series_ids))) as executor:
+        frames = executor.map(lambda sid: fetch_fred_series(sid, api_key), series_ids)
+        return dict(zip(series_ids, frames))
+
 def _get_mock_data(series_id):
     """Fallback mock data if API fails or no key."""
     dates = pd.date_range(end=datetime.today(), periods=24, freq='MS')
@@ -1,6 +1,7 @@
 """
 Service for FX (USD) conversion.
 """
+import numpy as np
 import pandas as pd
 import os
 try:
@@ -40,22 +41,44 @@ def fetch_usd_bde(username=None, password=None) -> pd.DataFrame:
     
     return df
 
-def attach_usd(df_metrics: pd.DataFrame, df_usd: pd.DataFrame) -> pd.DataFrame:
+_NAIVE_NS = np.dtype('datetime64[ns]')
+
+def _to_naive_ns(values: pd.Series) -> pd.Series:
+    """Parse to tz-naive datetime64[ns] (invalid values become NaT)."""
+    values = pd.to_datetime(values, errors='coerce')
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = values.dt.tz_localize(None)
+    return values.astype(_NAIVE_NS)
+
+def attach_usd(df_metrics: pd.DataFrame, df_usd: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
     """
     Attaches USD value.
     For monthly context, we might want 'average monthly USD' or 'daily USD'.
     Brief says: "USD re-muestreados a vista mensual... o fin de mes".
     We'll use merge_asof (daily match) for simplicity and robustness.
+    
+    Both date keys are brought to tz-naive datetime64[ns] so merge_asof
+    runs on int64 keys. Date columns already in that dtype and frames
+    already sorted by date are used as-is. With copy=False a needed 'date'
+    cast is written back into df_metrics instead of a copy; df_usd is
+    never modified.
     """
-    out = df_metrics.copy()
+    out = df_metrics
+    if out['date'].dtype != _NAIVE_NS:
+        out = out.copy() if copy else out
+        out['date'] = _to_naive_ns(out['date'])
     
-    out['date'] = pd.to_datetime(out['date']).astype('datetime64[ns]')
-    df_usd['fecha'] = pd.to_datetime(df_usd['fecha']).astype('datetime64[ns]')
-    df_usd = df_usd.sort_values('fecha')
+    usd = df_usd[['fecha', 'valor']]
+    if usd['fecha'].dtype != _NAIVE_NS:
+        usd = usd.assign(fecha=_to_naive_ns(usd['fecha']))
+        # Unparseable USD dates cannot be matched (merge_asof rejects null keys)
+        usd = usd.dropna(subset=['fecha'])
+    if not usd['fecha'].is_monotonic_increasing:
+        usd = usd.sort_values('fecha')
     
     merged = pd.merge_asof(
-        out.sort_values('date'),
-        df_usd[['fecha', 'valor']],
+        out if out['date'].is_monotonic_increasing else out.sort_values('date'),
+        usd,
         left_on='date',
         right_on='fecha',
         direction='backward'
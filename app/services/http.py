@@ -1,23 +1,90 @@
 """HTTP client utilities."""
+import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
 import time
 
+# requests-cache is optional; without it cached clients fall back to a plain session
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', '.cache/http')
+DEFAULT_CACHE_TTL = 3600
+
+# Status codes worth retrying; other HTTP errors (bad ids, invalid keys) are
+# raised at once so callers can fall back without waiting out the backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Shared client: (connect, read) timeouts and attempts sized so a dead
+# upstream fails within ~17s (2 x 8s + 1s backoff), inside the chat tools'
+# 20s TOOL_TIMEOUT, and callers still reach their fallbacks
+DEFAULT_TIMEOUT = (3.05, 8)
+DEFAULT_MAX_RETRIES = 2
+
 
 class HTTPClient:
     """HTTP client with retry logic and error handling."""
     
-    def __init__(self, timeout: int = 30, max_retries: int = 3, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        timeout: float | tuple = 30,
+        max_retries: int = 3,
+        api_key: Optional[str] = None,
+        cache_ttl: Optional[int] = None
+    ):
         self.timeout = timeout
         self.max_retries = max_retries
         self.api_key = api_key
-        self.session = requests.Session()
+        self.cache_ttl = cache_ttl
+        
+        self.cached = cache_ttl is not None and REQUESTS_CACHE_AVAILABLE
         
+        if self.cached:
+            # SQLite-backed response cache; expired entries are revalidated
+            # with ETag / Last-Modified when the server provides them
+            self.session = requests_cache.CachedSession(
+                HTTP_CACHE_PATH,
+                backend='sqlite',
+                expire_after=cache_ttl,
+                allowable_methods=('GET', 'POST'),
+                stale_if_error=True
+            )
+        else:
+            self.session = requests.Session()
+        
+        # Keep-alive pool sized for concurrent fetches from several threads
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
     def get(self, url: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
-        """Make GET request with retry logic."""
+        """Make GET request, retrying connection errors, timeouts, 429 and 5xx."""
+        return self._request('GET', url, headers, **kwargs)
+    
+    def post(self, url: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        """Make POST request, retrying connection errors, timeouts, 429 and 5xx."""
+        return self._request('POST', url, headers, **kwargs)
+    
+    def _request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        expire_after: Optional[int] = None,
+        **kwargs
+    ) -> requests.Response:
         if headers is None:
             headers = {}
         
+        # Per-request cache TTL (only meaningful for a cached session)
+        if expire_after is not None and self.cached:
+            kwargs['expire_after'] = expire_after
+        
         # Add default user agent if not provided
         if 'User-Agent' not in headers:
             headers['User-Agent'] = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
@@ -29,7 +96,8 @@ class HTTPClient:
         last_exception = None
         for attempt in range(self.max_retries):
             try:
-                response = self.session.get(
+                response = self.session.request(
+                    method,
                     url,
                     headers=headers,
                     timeout=self.timeout,
@@ -37,16 +105,40 @@ class HTTPClient:
                 )
                 response.raise_for_status()
                 return response
-            except requests.exceptions.RequestException as e:
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code not in RETRY_STATUSES:
+                    raise
+                last_exception = e
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
                 last_exception = e
-                if attempt < self.max_retries - 1:
-                    # Exponential backoff
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
-                    continue
-                    
+            
+            if attempt < self.max_retries - 1:
+                # Exponential backoff
+                wait_time = 2 ** attempt
+                time.sleep(wait_time)
+        
         raise last_exception
     
     def close(self):
         """Close the session."""
         self.session.close()
+
+
+# Shared client so service modules reuse pooled keep-alive connections
+_default_client: Optional[HTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> HTTPClient:
+    """Get or create the shared (disk-cached) HTTP client."""
+    global _default_client
+    
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HTTPClient(
+                timeout=DEFAULT_TIMEOUT,
+                max_retries=DEFAULT_MAX_RETRIES,
+                cache_ttl=DEFAULT_CACHE_TTL
+            )
+    
+    return _default_client
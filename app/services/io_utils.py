@@ -1,45 +1,66 @@
 """Parquet I/O utilities."""
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 import json
 
+# Rows per row group when writing, and per batch when profiling
+PARQUET_ROW_GROUP_SIZE = 64 * 1024
+PROFILE_BATCH_SIZE = 64 * 1024
 
-def write_parquet(df: pd.DataFrame, filepath: Path, compression: str = 'snappy') -> Dict[str, Any]:
+
+def write_parquet(
+    df: pd.DataFrame | pa.Table,
+    filepath: Path,
+    compression: str = 'zstd',
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE
+) -> Dict[str, Any]:
     """
     Write DataFrame to Parquet file.
     
     Args:
-        df: DataFrame to write
+        df: DataFrame (or Arrow table) to write
         filepath: Path to output file
-        compression: Compression algorithm (snappy, gzip, brotli)
+        compression: Compression algorithm (zstd, snappy, gzip, brotli)
+        row_group_size: Maximum rows per row group
     
     Returns:
         Metadata about the written file
     """
     filepath.parent.mkdir(parents=True, exist_ok=True)
     
-    df.to_parquet(
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+    
+    # Dictionary-encode repeated strings (bank/product names) and keep
+    # per-row-group statistics for column pruning and profiling
+    with pq.ParquetWriter(
         filepath,
-        engine='pyarrow',
+        table.schema,
         compression=compression,
-        index=False
-    )
+        use_dictionary=True,
+        write_statistics=True
+    ) as writer:
+        writer.write_table(table, row_group_size=row_group_size)
     
     return {
         'filepath': str(filepath),
-        'rows': len(df),
-        'columns': len(df.columns),
+        'rows': table.num_rows,
+        'columns': table.num_columns,
         'size_bytes': filepath.stat().st_size
     }
 
 
-def read_parquet(filepath: Path) -> pd.DataFrame:
+def read_parquet(filepath: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
     """
     Read Parquet file into DataFrame.
     
     Args:
         filepath: Path to Parquet file
+        columns: Only read these columns (None reads all)
     
     Returns:
         DataFrame
@@ -47,7 +68,41 @@ def read_parquet(filepath: Path) -> pd.DataFrame:
     if not filepath.exists():
         raise FileNotFoundError(f"Parquet file not found: {filepath}")
     
-    return pd.read_parquet(filepath, engine='pyarrow')
+    return pd.read_parquet(filepath, engine='pyarrow', columns=columns)
+
+
+def _footer_null_counts(metadata: pq.FileMetaData) -> Dict[str, int]:
+    """Null count per top-level column from row-group statistics, where every row group has one."""
+    counts = {}
+    for i in range(metadata.num_columns):
+        path = metadata.schema.column(i).path
+        if '.' in path:
+            continue
+        
+        total = 0
+        for rg in range(metadata.num_row_groups):
+            stats = metadata.row_group(rg).column(i).statistics
+            if stats is None or not stats.has_null_count:
+                total = None
+                break
+            total += stats.null_count
+        
+        if total is not None:
+            counts[path] = total
+    
+    return counts
+
+
+def _combined_dtype(dtypes: list, default):
+    """Dtype of the concatenated batches (int batches with nulls upcast, etc.)."""
+    if not dtypes:
+        return default
+    if all(d == dtypes[0] for d in dtypes):
+        return dtypes[0]
+    try:
+        return np.result_type(*dtypes)
+    except TypeError:
+        return np.dtype(object)
 
 
 def profile_parquet(filepath: Path, sample_rows: int = 5) -> Dict[str, Any]:
@@ -64,50 +119,106 @@ def profile_parquet(filepath: Path, sample_rows: int = 5) -> Dict[str, Any]:
     if not filepath.exists():
         raise FileNotFoundError(f"Parquet file not found: {filepath}")
     
-    df = read_parquet(filepath)
+    pf = pq.ParquetFile(filepath)
+    
+    # Column names and base dtypes as read_parquet would produce them
+    empty = pf.schema_arrow.empty_table().to_pandas()
+    columns = list(empty.columns)
+    
+    # Null counts come from the footer statistics when the writer stored
+    # them, except for float columns: Parquet does not count NaN as null,
+    # isnull() does, so those are counted from the data
+    footer_nulls = {
+        col: count for col, count in _footer_null_counts(pf.metadata).items()
+        if col in empty.columns and not pd.api.types.is_float_dtype(empty[col])
+    }
+    numeric_cols = [c for c in columns if pd.api.types.is_numeric_dtype(empty[c])]
+    text_cols = [
+        c for c in columns
+        if pd.api.types.is_object_dtype(empty[c]) or pd.api.types.is_string_dtype(empty[c])
+    ]
+    
+    total_rows = 0
+    memory_bytes = 0
+    sample = empty
+    batch_dtypes = {col: [] for col in columns}
+    null_counts = dict.fromkeys(columns, 0)
+    mins, maxs, sums, counts = {}, {}, dict.fromkeys(numeric_cols, 0), dict.fromkeys(numeric_cols, 0)
+    uniques = {col: {} for col in text_cols}  # insertion-ordered distinct values
+    
+    # Stream batches so only one batch is ever materialized in pandas
+    for batch in pf.iter_batches(batch_size=max(PROFILE_BATCH_SIZE, sample_rows), columns=columns):
+        part = batch.to_pandas()
+        if total_rows == 0:
+            sample = part.head(sample_rows)
+        total_rows += len(part)
+        memory_bytes += int(part.memory_usage(index=False, deep=True).sum())
+        
+        # One frame-wide pass for nulls and numeric aggregates per batch
+        batch_nulls = part.isnull().sum()
+        numeric_stats = part[numeric_cols].agg(['min', 'max', 'sum', 'count']) if numeric_cols else None
+        
+        for col in columns:
+            batch_dtypes[col].append(part[col].dtype)
+            if col not in footer_nulls:
+                null_counts[col] += int(batch_nulls[col])
+        
+        for col in numeric_cols:
+            stats = numeric_stats[col]
+            if stats['count'] > 0:
+                mins[col] = min(mins.get(col, stats['min']), stats['min'])
+                maxs[col] = max(maxs.get(col, stats['max']), stats['max'])
+                sums[col] += stats['sum']
+                counts[col] += int(stats['count'])
+        
+        for col in text_cols:
+            uniques[col].update(dict.fromkeys(part[col].dropna().unique().tolist()))
+    
+    null_counts.update(footer_nulls)
     
     # Column information
     columns_info = []
-    for col in df.columns:
+    for col in columns:
+        null_count = null_counts[col]
+        
         col_info = {
             'name': col,
-            'dtype': str(df[col].dtype),
-            'null_count': int(df[col].isnull().sum()),
-            'null_percentage': float(df[col].isnull().sum() / len(df) * 100) if len(df) > 0 else 0
+            'dtype': str(_combined_dtype(batch_dtypes[col], empty[col].dtype)),
+            'null_count': null_count,
+            'null_percentage': float(null_count / total_rows * 100) if total_rows > 0 else 0
         }
         
-        # Add basic stats for numeric columns
-        if pd.api.types.is_numeric_dtype(df[col]):
-            col_info['min'] = float(df[col].min()) if not df[col].isnull().all() else None
-            col_info['max'] = float(df[col].max()) if not df[col].isnull().all() else None
-            col_info['mean'] = float(df[col].mean()) if not df[col].isnull().all() else None
+        # Add basic stats for numeric columns (None when no value was counted)
+        if col in sums:
+            counted = counts[col] > 0
+            col_info['min'] = float(mins.get(col)) if counted else None
+            col_info['max'] = float(maxs.get(col)) if counted else None
+            col_info['mean'] = float(sums[col] / counts[col]) if counted else None
         
         # Add unique count for object/string columns
-        if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]):
-            col_info['unique_count'] = int(df[col].nunique())
-            col_info['sample_values'] = df[col].dropna().unique()[:5].tolist()
+        if col in uniques:
+            col_info['unique_count'] = len(uniques[col])
+            col_info['sample_values'] = list(uniques[col])[:5]
         
         columns_info.append(col_info)
     
-    # Sample data
-    sample_data = df.head(sample_rows).to_dict(orient='records')
-    
-    # Convert any non-JSON-serializable types
-    for record in sample_data:
-        for key, value in record.items():
-            if pd.isna(value):
-                record[key] = None
-            elif isinstance(value, (pd.Timestamp, pd.DatetimeTZDtype)):
-                record[key] = str(value)
+    # Sample data (pandas' C JSON writer maps NaN -> null and timestamps -> ISO)
+    sample_data = json.loads(sample.to_json(
+        orient='records',
+        date_format='iso',
+        date_unit='us',
+        double_precision=15,
+        default_handler=str
+    ))
     
     return {
         'filepath': str(filepath),
         'file_size_bytes': filepath.stat().st_size,
-        'total_rows': len(df),
-        'total_columns': len(df.columns),
+        'total_rows': total_rows,
+        'total_columns': len(columns),
         'columns': columns_info,
         'sample_data': sample_data,
-        'memory_usage_bytes': int(df.memory_usage(deep=True).sum())
+        'memory_usage_bytes': memory_bytes + int(pd.RangeIndex(total_rows).memory_usage())
     }
 
 
@@ -124,4 +235,14 @@ def list_parquet_files(data_dir: Path) -> list:
     if not data_dir.exists():
         return []
     
-    return [str(f.relative_to(data_dir)) for f in data_dir.rglob('*.parquet')]
+    return [os.path.relpath(path, data_dir) for path in _walk_parquet(str(data_dir))]
+
+
+def _walk_parquet(root: str):
+    """Yield paths ending in .parquet under root (DirEntry type info, no extra stat calls)."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name.endswith('.parquet'):
+                yield entry.path
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_parquet(entry.path)
@@ -2,10 +2,21 @@
 Normalization service for Bank Cost Benchmark data.
 Standardizes raw ingestion data into canonical formats.
 """
+import numpy as np
 import pandas as pd
 import re
 from typing import Optional
 
+# Numba is optional; CLP strings fall back to the pandas str pipeline without it
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Currency symbol and whitespace, stripped before parsing amounts
+_RE_CURRENCY_STRIP = re.compile(r'[$\s]')
+
 def to_clp(text: str) -> Optional[float]:
     """
     Parses a CLP currency string to float.
@@ -21,7 +32,7 @@ def to_clp(text: str) -> Optional[float]:
         
     s = str(text)
     # Remove $ and spaces
-    s = re.sub(r'[$\s]', '', s)
+    s = _RE_CURRENCY_STRIP.sub('', s)
     
     # In CMF/Chile data, dot is usually thousand separator, comma is decimal?
     # But CMF example was "$448". 
@@ -38,56 +49,175 @@ def to_clp(text: str) -> Optional[float]:
     except ValueError:
         return None
 
-def canon_cta(df: pd.DataFrame) -> pd.DataFrame:
+def _clp_str_pipeline(strings: pd.Series) -> pd.Series:
+    """to_clp string rules as one column-wide str pipeline (NaN where parsing fails)."""
+    return pd.to_numeric(
+        strings.str.replace(_RE_CURRENCY_STRIP, '', regex=True)
+               .str.replace('.', '', regex=False)
+               .str.replace(',', '.', regex=False),
+        errors='coerce'
+    )
+
+def _parse_clp_strings(strings: pd.Series) -> np.ndarray:
     """
-    Normalizes CMF Account Simulators data to canonical schema.
-    
-    Input columns: ['Institución', 'Producto', 'Costo neto total', 'source', 'extraction_date']
-    Output columns: ['date', 'institucion', 'producto', 'cta_mensual_clp', 'fuente', 'fecha_captura']
+    Parse a Series of CLP strings to float64.
+    ASCII input goes through the Numba byte scanner when available; rows it
+    cannot decide (and non-ASCII input) go through the str pipeline.
+    """
+    if NUMBA_AVAILABLE and len(strings) > 0:
+        try:
+            buf = strings.to_numpy(dtype='S')
+        except UnicodeEncodeError:
+            buf = None
+        
+        if buf is not None:
+            out, ok = _clp_bytes_kernel(buf.view(np.uint8).reshape(len(buf), buf.dtype.itemsize))
+            if not ok.all():
+                out[~ok] = _clp_str_pipeline(strings[~ok]).to_numpy(dtype=np.float64)
+            return out
     
-    * Note: 'date' is derived from extraction_date for versioning.
+    return _clp_str_pipeline(strings).to_numpy(dtype=np.float64)
+
+def _clp_vec(values: pd.Series) -> pd.Series:
     """
-    out = df.copy()
+    Vectorized to_clp over a Series (float64, NaN where parsing fails).
+    String cells are parsed column-wide; numeric cells pass through.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
     
-    # Rename map
-    rename_map = {
-        'Institución': 'institucion',
-        'Producto': 'producto',
-        'Costo neto total': 'raw_cost',
-        'source': 'fuente',
-        'extraction_date': 'fecha_captura'
-    }
+    # .str yields NaN for non-string cells, so this marks the string ones
+    is_str = values.str.len().notna().to_numpy()
     
-    canonical = {
-        'BANCO DE CHILE': 'BANCO DE CHILE',
-        'BANCO SANTANDER': 'BANCO SANTANDER',
-        'SCOTIABANK CHILE': 'SCOTIABANK',
-        'BANCO DEL ESTADO DE CHILE': 'BANCO ESTADO',
-        'ITAU CORPBANCA': 'ITAU',
-        'BANCO DE CREDITO E INVERSIONES': 'BCI',
-        'BANCO BICE': 'BANCO BICE',
-        'BANCO SECURITY': 'BANCO SECURITY',
-        'BANCO CONSORCIO': 'BANCO CONSORCIO',
-        'BANCO RIPLEY': 'BANCO RIPLEY',
-        'BANCO FALABELLA': 'BANCO FALABELLA'
-    }
+    parsed = pd.to_numeric(values.where(~is_str), errors='coerce').to_numpy(dtype=np.float64, copy=True)
+    if is_str.any():
+        parsed[is_str] = _parse_clp_strings(values[is_str])
     
-    out = out.rename(columns=rename_map)
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+if NUMBA_AVAILABLE:
+    # Exact powers of ten: mantissa / 10**k is then correctly rounded, like float()
+    _POW10 = np.array([float(10 ** k) for k in range(23)])
+    
+    # Rows are independent, so the scan is split across cores with prange
+    @njit(cache=True, parallel=True)
+    def _clp_bytes_kernel(buf):
+        """
+        Scan fixed-width ASCII rows: drop '$', whitespace and '.', read ',' as
+        the decimal point. Returns (values, ok); ok is False where the row is
+        not a plain [sign]digits[,digits] amount and needs the slow path.
+        """
+        n, width = buf.shape
+        out = np.full(n, np.nan)
+        ok = np.zeros(n, dtype=np.bool_)
+        
+        for i in prange(n):
+            mantissa = 0
+            scale = 0
+            digits = 0
+            negative = False
+            started = False
+            seen_point = False
+            ended = False
+            valid = True
+            
+            for j in range(width):
+                c = buf[i, j]
+                if c == 0:
+                    ended = True
+                    continue
+                if ended:
+                    valid = False
+                    break
+                # '$', '.', and whitespace as matched by \s
+                if c == 36 or c == 46 or c == 32 or 9 <= c <= 13 or 28 <= c <= 31:
+                    continue
+                if c == 44:
+                    if seen_point:
+                        valid = False
+                        break
+                    seen_point = True
+                    started = True
+                    continue
+                if (c == 45 or c == 43) and not started:
+                    negative = c == 45
+                    started = True
+                    continue
+                if 48 <= c <= 57:
+                    started = True
+                    digits += 1
+                    mantissa = mantissa * 10 + (c - 48)
+                    if seen_point:
+                        scale += 1
+                    if mantissa > 9007199254740992 or scale > 22:
+                        valid = False
+                        break
+                    continue
+                valid = False
+                break
+            
+            if valid and digits > 0:
+                value = mantissa / _POW10[scale]
+                out[i] = -value if negative else value
+                ok[i] = True
+        
+        return out, ok
+
+def _to_day(values: pd.Series) -> pd.Series:
+    """Timestamps truncated to midnight with a single datetime64[D] cast."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values)
     
-    # Parse Cost
-    out['cta_mensual_clp'] = out['raw_cost'].apply(to_clp)
+    # Keep wall-clock semantics for tz-aware input
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values.dt.normalize()
     
-    # Normalize strings
-    out['institucion'] = out['institucion'].str.strip().str.upper()
-    out['producto'] = out['producto'].str.strip()
+    return pd.Series(values.to_numpy().astype('datetime64[D]'), index=values.index)
+
+# Raw CMF institution names -> canonical short names (others kept as-is)
+_CANONICAL_INSTITUTIONS = pd.Series({
+    'BANCO DE CHILE': 'BANCO DE CHILE',
+    'BANCO SANTANDER': 'BANCO SANTANDER',
+    'SCOTIABANK CHILE': 'SCOTIABANK',
+    'BANCO DEL ESTADO DE CHILE': 'BANCO ESTADO',
+    'ITAU CORPBANCA': 'ITAU',
+    'BANCO DE CREDITO E INVERSIONES': 'BCI',
+    'BANCO BICE': 'BANCO BICE',
+    'BANCO SECURITY': 'BANCO SECURITY',
+    'BANCO CONSORCIO': 'BANCO CONSORCIO',
+    'BANCO RIPLEY': 'BANCO RIPLEY',
+    'BANCO FALABELLA': 'BANCO FALABELLA'
+})
+
+# Raw input columns each canon_* function reads (pass as read_parquet columns=)
+CTA_INPUT_COLS = ['Institución', 'Producto', 'Costo neto total', 'source', 'extraction_date']
+UF_INPUT_COLS = ['fecha', 'valor_uf', 'source', 'serie_id', 'extraction_date']
+
+def canon_cta(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalizes CMF Account Simulators data to canonical schema.
     
-    # Add 'date' column (normalized to date object from ISO timestamp)
-    out['date'] = pd.to_datetime(out['fecha_captura']).dt.normalize()
+    Input columns: ['Institución', 'Producto', 'Costo neto total', 'source', 'extraction_date']
+    Output columns: ['date', 'institucion', 'producto', 'cta_mensual_clp', 'fuente', 'fecha_captura']
     
-    # Select canonical columns
-    cols = ['date', 'institucion', 'producto', 'cta_mensual_clp', 'fuente', 'fecha_captura']
-    # Filter only columns that exist (in case 'date' is created from extraction)
-    return out[cols]
+    * Note: 'date' is derived from extraction_date for versioning.
+    * Note: 'institucion', 'producto' and 'fuente' are categorical (dictionary-encoded
+      in Parquet); 'cta_mensual_clp' is the smallest integer dtype that holds the
+      amounts when they are all whole and present, float64 otherwise.
+    """
+    # Normalize strings (few distinct values over many rows: stored as categoricals)
+    inst = df['Institución'].str.strip().str.upper()
+    
+    # Built straight from the input columns: no full-frame copy or rename pass
+    return pd.DataFrame({
+        # 'date' is the capture timestamp normalized to midnight
+        'date': _to_day(df['extraction_date']),
+        'institucion': inst.map(_CANONICAL_INSTITUTIONS).fillna(inst).astype('category'),
+        'producto': df['Producto'].str.strip().astype('category'),
+        'cta_mensual_clp': pd.to_numeric(_clp_vec(df['Costo neto total']), downcast='integer'),
+        'fuente': df['source'].astype('category'),
+        'fecha_captura': df['extraction_date']
+    })
 
 def canon_uf(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -96,17 +226,10 @@ def canon_uf(df: pd.DataFrame) -> pd.DataFrame:
     Input columns: ['fecha', 'valor_uf', 'source', 'serie_id', 'extraction_date']
     Output columns: ['fecha', 'valor', 'fuente', 'serie_id', 'fecha_captura']
     """
-    out = df.copy()
-    
-    rename_map = {
-        'valor_uf': 'valor',
-        'source': 'fuente',
-        'extraction_date': 'fecha_captura'
-    }
-    out = out.rename(columns=rename_map)
-    
-    out['fecha'] = pd.to_datetime(out['fecha'])
-    out['fecha_captura'] = pd.to_datetime(out['fecha_captura'])
-    
-    cols = ['fecha', 'valor', 'fuente', 'serie_id', 'fecha_captura']
-    return out[cols]
+    return pd.DataFrame({
+        'fecha': pd.to_datetime(df['fecha']),
+        'valor': df['valor_uf'],
+        'fuente': df['source'],
+        'serie_id': df['serie_id'],
+        'fecha_captura': pd.to_datetime(df['extraction_date'])
+    })
@@ -1,9 +1,70 @@
 """Data parsers for various sources."""
 from bs4 import BeautifulSoup
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from typing import Optional, Dict, Any
 import re
 import json
+from io import BytesIO, StringIO
+
+# Currency symbol and whitespace, stripped before parsing amounts
+_RE_CURRENCY_STRIP = re.compile(r'[$\s]')
+
+# Keys of a CMF simulador JSON record, in API order
+CMF_SIMULADOR_COLUMNS = ['Institución', 'Producto', 'Costo neto total']
+
+
+def _stamp_metadata(df: pd.DataFrame, source: str, extraction_date=None) -> None:
+    """
+    Add the 'source' and 'extraction_date' columns in place.
+    
+    Args:
+        df: DataFrame to stamp
+        source: Source label (stored as a one-category categorical)
+        extraction_date: Timestamp to record (default: now)
+    """
+    df['source'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[source])
+    
+    # numpy datetime64 scalar broadcasts without boxing a Timestamp per row
+    stamp = pd.Timestamp.now() if extraction_date is None else extraction_date
+    df['extraction_date'] = np.datetime64(stamp.to_datetime64(), 'us')
+
+
+def _read_html_tables(html, match: str = '.+') -> list:
+    """
+    Parse every non-empty table of an HTML document in a single pass.
+    
+    Args:
+        html: HTML content (str, or raw bytes left for the parser to decode)
+        match: Only convert tables whose text matches this regex
+    
+    Returns:
+        List of DataFrames (empty if the one-pass parse fails)
+    """
+    try:
+        buffer = BytesIO(html) if isinstance(html, (bytes, bytearray)) else StringIO(html)
+        return [df for df in pd.read_html(buffer, match=match) if len(df) > 0]
+    except Exception:
+        return []
+
+
+def parse_cmf_simulador_json(records: list) -> pd.DataFrame:
+    """
+    Parse CMF simulador JSON records with the known schema.
+    
+    Args:
+        records: List of dicts keyed by CMF_SIMULADOR_COLUMNS
+    
+    Returns:
+        DataFrame with checking account data
+    """
+    # Pinned columns: no key inference over the records
+    df = pd.DataFrame(records, columns=CMF_SIMULADOR_COLUMNS)
+    
+    _stamp_metadata(df, 'CMF_SIMULADOR')
+    
+    return df
 
 
 def parse_cmf_simulador(data: Any) -> pd.DataFrame:
@@ -16,34 +77,43 @@ def parse_cmf_simulador(data: Any) -> pd.DataFrame:
     Returns:
         DataFrame with checking account data
     """
+    # Known JSON schema (records share the first record's keys): fast path
+    if isinstance(data, list) and data and isinstance(data[0], dict) and list(data[0]) == CMF_SIMULADOR_COLUMNS:
+        return parse_cmf_simulador_json(data)
+    
     # Si es JSON
     if isinstance(data, dict) or isinstance(data, list):
         df = pd.DataFrame(data) if isinstance(data, list) else pd.DataFrame([data])
     else:
-        # Si es HTML, intentar parsear
-        soup = BeautifulSoup(str(data), 'lxml')
-        tables = soup.find_all('table')
-        
-        if not tables:
-            raise ValueError("No tables found in CMF response")
+        # Si es HTML, intentar parsear (str and raw bytes as-is, no str() copy)
+        html = data if isinstance(data, (str, bytes)) else str(data)
         
-        dfs = []
-        for table in tables:
-            try:
-                table_df = pd.read_html(str(table))[0]
-                if len(table_df) > 0:
-                    dfs.append(table_df)
-            except Exception:
-                continue
+        # Tables with the CMF header first, so navigation/footer tables are
+        # never converted; then any table
+        dfs = _read_html_tables(html, match=CMF_SIMULADOR_COLUMNS[0]) or _read_html_tables(html)
         
         if not dfs:
-            raise ValueError("Could not parse any tables from CMF")
+            # Table by table, so one malformed table does not sink the rest
+            soup = BeautifulSoup(html, 'lxml')
+            tables = soup.find_all('table')
+            
+            if not tables:
+                raise ValueError("No tables found in CMF response")
+            
+            for table in tables:
+                try:
+                    table_df = pd.read_html(StringIO(str(table)))[0]
+                    if len(table_df) > 0:
+                        dfs.append(table_df)
+                except Exception:
+                    continue
+            
+            if not dfs:
+                raise ValueError("Could not parse any tables from CMF")
         
         df = max(dfs, key=len)
     
-    # Add metadata
-    df['source'] = 'CMF_SIMULADOR'
-    df['extraction_date'] = pd.Timestamp.now()
+    _stamp_metadata(df, 'CMF_SIMULADOR')
     
     return df
 
@@ -58,29 +128,30 @@ def parse_sernac_cards(html_content: str) -> pd.DataFrame:
     Returns:
         DataFrame with credit card data
     """
-    soup = BeautifulSoup(html_content, 'lxml')
-    tables = soup.find_all('table')
-    
-    if not tables:
-        raise ValueError("No tables found in SERNAC HTML content")
-    
-    dfs = []
-    for table in tables:
-        try:
-            df = pd.read_html(str(table))[0]
-            if len(df) > 0:
-                dfs.append(df)
-        except Exception:
-            continue
+    dfs = _read_html_tables(html_content)
     
     if not dfs:
-        raise ValueError("Could not parse any tables from SERNAC HTML")
+        # Table by table, so one malformed table does not sink the rest
+        soup = BeautifulSoup(html_content, 'lxml')
+        tables = soup.find_all('table')
+        
+        if not tables:
+            raise ValueError("No tables found in SERNAC HTML content")
+        
+        for table in tables:
+            try:
+                df = pd.read_html(StringIO(str(table)))[0]
+                if len(df) > 0:
+                    dfs.append(df)
+            except Exception:
+                continue
+        
+        if not dfs:
+            raise ValueError("Could not parse any tables from SERNAC HTML")
     
     result_df = max(dfs, key=len)
     
-    # Add metadata
-    result_df['source'] = 'SERNAC'
-    result_df['extraction_date'] = pd.Timestamp.now()
+    _stamp_metadata(result_df, 'SERNAC')
     
     return result_df
 
@@ -94,37 +165,99 @@ def parse_bde_api_response(json_data: Dict[str, Any], indicator_name: str = 'UF'
         indicator_name: Name of the indicator (UF, IPC, etc.)
     
     Returns:
-        DataFrame with indicator values
+        DataFrame with indicator values (pd.ArrowDtype columns; 'indicator'
+        and 'source' dictionary-encoded)
     """
     # La estructura del API del Banco Central puede variar
     # Intentar diferentes estructuras comunes
     
-    df = None
+    records = None
     
     # Intentar estructura con 'Series'
     if 'Series' in json_data:
         series_data = json_data['Series']
         if isinstance(series_data, dict) and 'Obs' in series_data:
-            df = pd.DataFrame(series_data['Obs'])
+            records = series_data['Obs']
         elif isinstance(series_data, list) and len(series_data) > 0:
             if 'Obs' in series_data[0]:
-                df = pd.DataFrame(series_data[0]['Obs'])
+                records = series_data[0]['Obs']
     
     # Intentar estructura directa con datos
     elif isinstance(json_data, list):
-        df = pd.DataFrame(json_data)
+        records = json_data
     elif isinstance(json_data, dict) and 'data' in json_data:
-        df = pd.DataFrame(json_data['data'])
+        records = json_data['data']
     
-    if df is None:
+    if records is None:
         raise ValueError(f"Unexpected JSON structure from BDE API: {list(json_data.keys())}")
     
-    # Add metadata
-    df['indicator'] = indicator_name
-    df['source'] = 'BDE_API'
-    df['extraction_date'] = pd.Timestamp.now()
+    metadata = {'indicator': indicator_name, 'source': 'BDE_API'}
+    extraction_date = pd.Timestamp.now()
     
-    return df
+    # List of observation dicts sharing one key set (from_pylist takes its
+    # schema from the first record, so other shapes use the DataFrame path):
+    # Arrow infers types in C and pandas gets Arrow-backed columns; the
+    # constant labels are dictionary-encoded
+    if (
+        isinstance(records, list) and records
+        and all(isinstance(r, dict) for r in records)
+        and all(r.keys() == records[0].keys() for r in records)
+    ):
+        try:
+            table = pa.Table.from_pylist(records)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = None
+        
+        if table is not None:
+            n = table.num_rows
+            table = table.drop_columns([c for c in (*metadata, 'extraction_date') if c in table.column_names])
+            for name, value in metadata.items():
+                indices = pa.repeat(pa.scalar(0, pa.int8()), n)
+                table = table.append_column(name, pa.DictionaryArray.from_arrays(indices, pa.array([value])))
+            table = table.append_column('extraction_date', pa.repeat(pa.scalar(extraction_date), n))
+            
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+    
+    df = pd.DataFrame(records)
+    df['indicator'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[indicator_name])
+    _stamp_metadata(df, metadata['source'], extraction_date)
+    
+    # Same Arrow-backed dtypes as the fast path, whichever payload arrived
+    return _arrow_backed(df)
+
+
+def _arrow_backed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Round-trip a DataFrame through Arrow so its columns are ArrowDtype.
+    
+    Args:
+        df: DataFrame to convert (column labels are kept as-is)
+    
+    Returns:
+        DataFrame with pd.ArrowDtype columns; object columns Arrow cannot
+        type (mixed values) become strings
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mixed = {col: 'string' for col in df.columns if df[col].dtype == object}
+        table = pa.Table.from_pandas(df.astype(mixed), preserve_index=False)
+    
+    # pandas strings arrive as large_string; use string like from_pylist does
+    table = table.cast(pa.schema([field.with_type(_arrow_string(field.type)) for field in table.schema]))
+    
+    out = table.to_pandas(types_mapper=pd.ArrowDtype)
+    out.columns = df.columns
+    return out
+
+
+def _arrow_string(arrow_type: pa.DataType) -> pa.DataType:
+    """arrow_type with large_string (also as dictionary values) narrowed to string."""
+    if pa.types.is_large_string(arrow_type):
+        return pa.string()
+    if pa.types.is_dictionary(arrow_type) and pa.types.is_large_string(arrow_type.value_type):
+        return pa.dictionary(arrow_type.index_type, pa.string())
+    return arrow_type
 
 
 def clean_currency_string(value: str) -> Optional[float]:
@@ -141,7 +274,7 @@ def clean_currency_string(value: str) -> Optional[float]:
         return None
     
     # Remove currency symbols and whitespace
-    cleaned = re.sub(r'[$\s]', '', str(value))
+    cleaned = _RE_CURRENCY_STRIP.sub('', str(value))
     
     # Handle Chilean format (1.234,56) vs US format (1,234.56)
     if ',' in cleaned and '.' in cleaned:
@@ -163,3 +296,32 @@ def clean_currency_string(value: str) -> Optional[float]:
         return float(cleaned)
     except ValueError:
         return None
+
+
+def clean_currency_series(values: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_currency_string over a Series.
+    
+    Args:
+        values: Series of currency strings (or numbers)
+    
+    Returns:
+        float64 Series, NaN where a value is missing or cannot be parsed
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    
+    cleaned = values.astype(str).str.replace(_RE_CURRENCY_STRIP, '', regex=True)
+    
+    # Decimal separator is whichever of ',' / '.' comes last
+    last_comma = cleaned.str.rfind(',')
+    last_dot = cleaned.str.rfind('.')
+    chilean = (last_dot >= 0) & (last_comma > last_dot)
+    us = (last_comma >= 0) & (last_dot > last_comma)
+    comma_only = (last_comma >= 0) & (last_dot < 0)
+    
+    cleaned[chilean] = cleaned[chilean].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    cleaned[us] = cleaned[us].str.replace(',', '', regex=False)
+    cleaned[comma_only] = cleaned[comma_only].str.replace(',', '.', regex=False)
+    
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64').where(values.notna())
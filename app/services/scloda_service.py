@@ -5,15 +5,23 @@ Handles:
 - OpenRouter API calls with Gemini 2.0 Flash
 - Function calling (tool use) for market data queries
 - Conversation context management
+- Streaming (SSE) responses
 """
 import os
+import re
 import json
+import atexit
+import time
+import random
 import httpx
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Iterator
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-from app.services.scloda_tools import SCLODA_TOOLS, execute_tool
+from app.services.scloda_tools import SCLODA_TOOLS, SCLODA_TOOLS_SLIM, execute_tool
+from app.services.ttl_cache import TTLCache
 from app.ml.logging_utils import get_logger
 
 logger = get_logger("scloda.service")
@@ -23,15 +31,150 @@ OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-2.0-flash-001")
 
+# Replies when OPENROUTER_API_KEY is unset, shared by reference (do not mutate)
+_NO_API_CHAT = {
+    "response": "⚠️ API no configurada. Agrega OPENROUTER_API_KEY al archivo .env",
+    "tokens_used": 0,
+    "error": "no_api_key"
+}
+_NO_API_INSIGHT = {
+    "insight": "API not configured.",
+    "tokens_used": 0
+}
+
+# Prompt token budget per call (well under the model's window, to bound
+# prefill latency and cost) and the completion cap sent as max_tokens
+CONTEXT_TOKEN_BUDGET = int(os.getenv("OPENROUTER_CONTEXT_TOKENS", "32000"))
+MAX_OUTPUT_TOKENS = 1024
+CONTEXT_TOKEN_BUFFER = 512
+
+# Per-request timeouts of the shared OpenRouter client (seconds)
+OPENROUTER_READ_TIMEOUT = 30.0
+OPENROUTER_CONNECT_TIMEOUT = 5.0
+
+# Retries for rate limits (429), transient 5xx and timeouts; no retry may
+# start past the budget (seconds from the first attempt). The budget fits two
+# full read timeouts plus the largest backoff, so a read timeout is retried.
+# Worst case per call: a retry starting at the budget plus one more
+# connect + read timeout, ~104s, inside gunicorn's --timeout 120 (Dockerfile)
+OPENROUTER_MAX_ATTEMPTS = 3
+OPENROUTER_RETRY_STATUSES = {429, 500, 502, 503, 504}
+OPENROUTER_MAX_BACKOFF = 8.5  # _retry_delay cap (8s) plus its jitter
+OPENROUTER_RETRY_BUDGET = 2 * OPENROUTER_READ_TIMEOUT + OPENROUTER_MAX_BACKOFF
+
+# Completion caps for the short-form helpers (~30-word insight, ~45-word analysis)
+INSIGHT_MAX_TOKENS = 100
+MODEL_ANALYSIS_MAX_TOKENS = 200
+
+# Prompt-cache breakpoints: the static system prompt lives longer than the
+# conversation prefix; the current user message is never cached
+SYSTEM_CACHE_CONTROL = {"type": "ephemeral", "ttl": "1h"}
+HISTORY_CACHE_CONTROL = {"type": "ephemeral"}
+
+# Seconds to wait for a tool before answering without its result
+TOOL_TIMEOUT = 20.0
+
+# Concurrent OpenRouter calls for one batch of chart insights
+INSIGHT_BATCH_CONCURRENCY = 8
+
+# Insight/analysis results are reused for identical (discretized) inputs:
+# dashboards poll the same few asset/trend combinations all day
+INSIGHT_CACHE_TTL = 60
+MODEL_ANALYSIS_CACHE_TTL = 3600
+
+# First {...} object in an LLM reply (one nesting level), ignoring fences/prose
+_JSON_BLOCK_RE = re.compile(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", re.S)
+
+# orjson is optional; the stdlib json module is used without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# h2 is optional; without it the shared client speaks HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared client: one TLS handshake, then pooled (HTTP/2-multiplexed) requests
+_HTTP_CLIENT = httpx.Client(
+    http2=HTTP2_AVAILABLE,
+    timeout=httpx.Timeout(OPENROUTER_READ_TIMEOUT, connect=OPENROUTER_CONNECT_TIMEOUT),
+    headers={
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "HTTP-Referer": "https://costbench.cl",
+        "X-Title": "CostBench - Scloda Chat"
+    },
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+)
+atexit.register(_HTTP_CLIENT.close)
+
+
+
+def _json_bytes(obj: Any) -> bytes:
+    """UTF-8 JSON encoding of obj (orjson when available, stdlib otherwise)."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(data: str | bytes) -> Any:
+    """Parse JSON text (orjson when available, stdlib otherwise)."""
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+_insight_cache = TTLCache(maxsize=512, ttl=INSIGHT_CACHE_TTL)
+_model_analysis_cache = TTLCache(maxsize=512, ttl=MODEL_ANALYSIS_CACHE_TTL)
+
+
+# Prompt guide at the repository root
+PROMPT_FILE = Path(__file__).parent.parent.parent / "AI_PROMPT_GUIDE.md"
+
+
+def _prompt_file_version() -> int | None:
+    """mtime of the prompt file (None if missing): one stat, no read."""
+    try:
+        return PROMPT_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
 
 def _load_system_prompt() -> str:
     """Load system prompt from AI_PROMPT_GUIDE.md if available, otherwise use default."""
-    # Try to load from file
-    prompt_file = Path(__file__).parent.parent.parent / "AI_PROMPT_GUIDE.md"
-    
-    if prompt_file.exists():
+    # The file is only re-read when its mtime changes
+    return _build_system_prompt(_prompt_file_version())
+
+
+def _load_system_message() -> dict:
+    """
+    The system message for chat turns, shared (not copied) across calls so
+    the serialized prefix is byte-identical and provider prefix caches hit.
+    Callers must not mutate it.
+    """
+    return _build_system_message(_prompt_file_version())
+
+
+@lru_cache(maxsize=1)
+def _build_system_message(mtime_ns: int | None) -> dict:
+    """Multipart system message with a cache breakpoint for a prompt-file version."""
+    return {
+        "role": "system",
+        "content": [{"type": "text", "text": _build_system_prompt(mtime_ns), "cache_control": SYSTEM_CACHE_CONTROL}]
+    }
+
+
+@lru_cache(maxsize=1)
+def _build_system_prompt(mtime_ns: int | None) -> str:
+    """Build the system prompt for a given prompt-file version (None: no file)."""
+    if mtime_ns is not None:
         try:
-            content = prompt_file.read_text(encoding="utf-8")
+            content = PROMPT_FILE.read_text(encoding="utf-8")
             # Add a prefix to make it clear this is a system prompt
             return f"""You are Scloda, the AI analyst for CostBench. Use the following guide as your knowledge base and persona definition:
 
@@ -146,55 +289,36 @@ def chat_completion(
     
     Args:
         user_message: The user's message
-        conversation_history: Previous messages in the conversation
+        conversation_history: Previous messages in the conversation (oldest
+            are dropped once the prompt would exceed CONTEXT_TOKEN_BUDGET)
         
     Returns:
-        dict with 'response' (text) and 'tokens_used'
+        dict with 'response' (text), 'tokens_used' and the prompt-cache
+        'cache_read_tokens' / 'cache_creation_tokens'
     """
     if not OPENROUTER_API_KEY:
-        return {
-            "response": "⚠️ API no configurada. Agrega OPENROUTER_API_KEY al archivo .env",
-            "tokens_used": 0,
-            "error": "no_api_key"
-        }
+        return _NO_API_CHAT
     
-    # Build messages - load prompt from file
-    system_prompt = _load_system_prompt()
-    messages = [{"role": "system", "content": system_prompt}]
+    messages = _build_chat_messages(user_message, conversation_history)
     
-    # Add conversation history (last 10 messages max)
-    if conversation_history:
-        messages.extend(conversation_history[-10:])
-    
-    # Add current user message
-    messages.append({"role": "user", "content": user_message})
+    # The follow-up call offers the same tools, so its prefix (tools, system,
+    # messages) matches the first call's and is read from the prompt cache
+    tools = _turn_tools(conversation_history)
     
     try:
         # First API call
-        response = _call_openrouter(messages, tools=SCLODA_TOOLS)
+        response = _call_openrouter(messages, tools=tools)
         
         if "error" in response:
             return response
         
         assistant_message = response["choices"][0]["message"]
-        tokens_used = response.get("usage", {}).get("total_tokens", 0)
+        tokens_used, cache_read, cache_write = _usage_tokens(response)
         
         # Check for tool calls
         if assistant_message.get("tool_calls"):
             # Execute tools and get results
-            tool_results = []
-            for tool_call in assistant_message["tool_calls"]:
-                function_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
-                
-                logger.info("tool_call", tool=function_name, args=arguments)
-                
-                result = execute_tool(function_name, arguments)
-                tool_results.append({
-                    "tool_call_id": tool_call["id"],
-                    "role": "tool",
-                    "content": json.dumps(result, ensure_ascii=False)
-                })
+            tool_results = _tool_result_messages(assistant_message["tool_calls"])
             
             # Add assistant message with tool calls
             messages.append(assistant_message)
@@ -202,25 +326,29 @@ def chat_completion(
             # Add tool results
             messages.extend(tool_results)
             
-            # Second API call with tool results
-            final_response = _call_openrouter(messages, tools=None)
+            # Second API call with tool results (no further tool round)
+            final_response = _call_openrouter(messages, tools=tools, tool_choice="none")
             
             if "error" in final_response:
                 return final_response
             
             final_content = final_response["choices"][0]["message"]["content"]
-            tokens_used += final_response.get("usage", {}).get("total_tokens", 0)
+            final_tokens, final_read, final_write = _usage_tokens(final_response)
             
             return {
                 "response": final_content,
-                "tokens_used": tokens_used,
+                "tokens_used": tokens_used + final_tokens,
+                "cache_read_tokens": cache_read + final_read,
+                "cache_creation_tokens": cache_write + final_write,
                 "tools_used": [tc["function"]["name"] for tc in assistant_message["tool_calls"]]
             }
         
         # No tool calls, return direct response
         return {
             "response": assistant_message.get("content", ""),
-            "tokens_used": tokens_used
+            "tokens_used": tokens_used,
+            "cache_read_tokens": cache_read,
+            "cache_creation_tokens": cache_write
         }
         
     except Exception as e:
@@ -232,43 +360,375 @@ def chat_completion(
         }
 
 
-def _call_openrouter(messages: list[dict], tools: list[dict] | None = None) -> dict:
-    """Make an API call to OpenRouter."""
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://costbench.cl",
-        "X-Title": "CostBench - Scloda Chat"
-    }
+def stream_completion(
+    user_message: str,
+    conversation_history: list[dict] | None = None
+) -> Iterator[str]:
+    """
+    Streaming variant of chat_completion: yields response text as it arrives.
     
+    Args:
+        user_message: The user's message
+        conversation_history: Previous messages in the conversation
+    
+    Yields:
+        Response text fragments, in order
+    """
+    if not OPENROUTER_API_KEY:
+        yield _NO_API_CHAT["response"]
+        return
+    
+    messages = _build_chat_messages(user_message, conversation_history)
+    tools = _turn_tools(conversation_history)
+    
+    try:
+        content = []
+        tool_calls: dict[int, dict] = {}
+        
+        for delta in _stream_openrouter(messages, tools=tools):
+            if delta.get("content"):
+                content.append(delta["content"])
+                yield delta["content"]
+            
+            # Tool calls arrive in fragments keyed by index; arguments are
+            # concatenated until the stream finishes
+            for fragment in delta.get("tool_calls") or []:
+                call = tool_calls.setdefault(
+                    fragment.get("index", 0),
+                    {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+                )
+                call["id"] = fragment.get("id") or call["id"]
+                function = fragment.get("function") or {}
+                call["function"]["name"] += function.get("name") or ""
+                call["function"]["arguments"] += function.get("arguments") or ""
+        
+        if not tool_calls:
+            return
+        
+        # Second pass with tool results
+        assistant_message = {
+            "role": "assistant",
+            "content": "".join(content) or None,
+            "tool_calls": [tool_calls[i] for i in sorted(tool_calls)]
+        }
+        messages.append(assistant_message)
+        messages.extend(_tool_result_messages(assistant_message["tool_calls"]))
+        
+        # Same tools as the first pass (cached prefix), but no further tool round
+        for delta in _stream_openrouter(messages, tools=tools, tool_choice="none"):
+            if delta.get("content"):
+                yield delta["content"]
+    
+    except Exception as e:
+        logger.error("chat_stream_error", error=str(e))
+        yield "😅 Ups, tuve un problema técnico. Intenta de nuevo en un momento."
+
+
+def _build_chat_messages(user_message: str, conversation_history: list[dict] | None) -> list[dict]:
+    """Shared system message, the history that fits the token budget, then the current message."""
+    system_message = _load_system_message()
+    user_turn = {"role": "user", "content": user_message}
+    budget = (
+        CONTEXT_TOKEN_BUDGET - MAX_OUTPUT_TOKENS - CONTEXT_TOKEN_BUFFER
+        - _estimate_tokens(system_message) - _estimate_tokens(user_turn)
+    )
+    
+    return [
+        system_message,
+        *_trim_history(conversation_history or [], budget),
+        user_turn
+    ]
+
+
+def _turn_tools(conversation_history: list[dict] | None) -> list[dict]:
+    """
+    Full tool definitions on a conversation's first turn, the slim ones after;
+    follow-up turns then share one (smaller) cacheable prefix.
+    """
+    return SCLODA_TOOLS_SLIM if conversation_history else SCLODA_TOOLS
+
+
+def _tool_result_messages(tool_calls: list[dict]) -> list[dict]:
+    """Execute the requested tools and wrap each result as a 'tool' message."""
+    results = _execute_tools(tool_calls)
+    
+    return [
+        {
+            "tool_call_id": tool_call["id"],
+            "role": "tool",
+            "content": _json_bytes(result).decode("utf-8")
+        }
+        for tool_call, result in zip(tool_calls, results)
+    ]
+
+
+def _estimate_tokens(message: dict) -> int:
+    """Rough token count of a message (~4 characters per token, plus framing)."""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        chars = sum(len(part.get("text", "")) for part in content)
+    else:
+        chars = len(content)
+    
+    if message.get("tool_calls"):
+        chars += len(_json_bytes(message["tool_calls"]))
+    
+    return chars // 4 + 4
+
+
+def _trim_history(history: list[dict], budget: int, preserve_recent_turns: int = 2) -> list[dict]:
+    """
+    Sliding window over the conversation: drop the oldest messages until the
+    rest fits the token budget.
+    
+    Args:
+        history: Previous messages, oldest first
+        budget: Token budget for the history
+        preserve_recent_turns: Most recent messages kept even over budget
+    
+    Returns:
+        The most recent messages that fit, never starting with a tool result
+        whose assistant tool call was dropped
+    """
+    start = len(history)
+    used = 0
+    while start > 0:
+        cost = _estimate_tokens(history[start - 1])
+        if used + cost > budget and len(history) - start >= preserve_recent_turns:
+            break
+        used += cost
+        start -= 1
+    
+    # Tool results must follow the assistant message that requested them
+    while start < len(history) and history[start].get("role") == "tool":
+        start += 1
+    
+    return history[start:]
+
+
+def _execute_tools(tool_calls: list[dict]) -> list[dict]:
+    """
+    Run the requested tools concurrently (each hits its own upstream API).
+    
+    Args:
+        tool_calls: Tool calls from the assistant message
+    
+    Returns:
+        One result per call, in call order; a tool still running after
+        TOOL_TIMEOUT gets an error result instead of blocking the turn
+    """
+    calls = []
+    for tool_call in tool_calls:
+        function_name = tool_call["function"]["name"]
+        # Raw JSON string: execute_tool parses it only if the tool runs
+        arguments = tool_call["function"]["arguments"]
+        
+        logger.info("tool_call", tool=function_name, args=arguments)
+        calls.append((function_name, arguments))
+    
+    if len(calls) == 1:
+        return [execute_tool(*calls[0])]
+    
+    executor = ThreadPoolExecutor(max_workers=len(calls))
+    try:
+        futures = [executor.submit(execute_tool, name, args) for name, args in calls]
+        
+        # One shared deadline, so the wait is bounded by the slowest tool
+        deadline = time.monotonic() + TOOL_TIMEOUT
+        results = []
+        for (function_name, _), future in zip(calls, futures):
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except FutureTimeoutError:
+                logger.warning("tool_timeout", tool=function_name)
+                results.append({"error": f"Tool timed out after {TOOL_TIMEOUT:g}s"})
+        return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _usage_tokens(response: dict) -> tuple[int, int, int]:
+    """(total, cache read, cache creation) token counts from a response's usage block."""
+    usage = response.get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    
+    # Anthropic-style fields when passed through, OpenRouter's normalized ones otherwise
+    cache_read = usage.get("cache_read_input_tokens", details.get("cached_tokens", 0))
+    cache_write = usage.get("cache_creation_input_tokens", details.get("cache_write_tokens", 0))
+    
+    return usage.get("total_tokens", 0), cache_read or 0, cache_write or 0
+
+
+def _with_cache_breakpoints(messages: list[dict], cache_final: bool = False) -> list[dict]:
+    """
+    Copy of messages with prompt-cache breakpoints on the system prompt and on
+    the last stable text turn before the current user message.
+    
+    The current user message gets one too when a tool-call follow-up may
+    append to it (cache_final) or already has. The follow-up sends the same
+    tools, so its prefix up to that breakpoint is byte-identical to the first
+    call's and is read from cache.
+    """
+    messages = list(messages)
+    
+    if messages and messages[0]["role"] == "system" and isinstance(messages[0]["content"], str):
+        messages[0] = {
+            "role": "system",
+            "content": [{"type": "text", "text": messages[0]["content"], "cache_control": SYSTEM_CACHE_CONTROL}]
+        }
+    
+    current = next((i for i in range(len(messages) - 1, 0, -1) if messages[i]["role"] == "user"), None)
+    if current is None:
+        return messages
+    
+    for i in range(current - 1, 0, -1):
+        if _is_text_turn(messages[i]):
+            messages[i] = _with_cache_control(messages[i])
+            break
+    
+    if (cache_final or current < len(messages) - 1) and _is_text_turn(messages[current]):
+        messages[current] = _with_cache_control(messages[current])
+    
+    return messages
+
+
+def _is_text_turn(message: dict) -> bool:
+    """True for a user/assistant message with non-empty plain-text content."""
+    return message["role"] in ("user", "assistant") and isinstance(message.get("content"), str) and bool(message["content"])
+
+
+def _with_cache_control(message: dict) -> dict:
+    """Copy of a text message as multipart content carrying a cache breakpoint."""
+    return {
+        **message,
+        "content": [{"type": "text", "text": message["content"], "cache_control": HISTORY_CACHE_CONTROL}]
+    }
+
+
+def _openrouter_payload(
+    messages: list[dict],
+    tools: list[dict] | None = None,
+    response_format: dict | None = None,
+    max_tokens: int = MAX_OUTPUT_TOKENS,
+    stop: list[str] | None = None,
+    tool_choice: str = "auto"
+) -> dict:
+    """Request body for an OpenRouter chat completion."""
     payload = {
         "model": OPENROUTER_MODEL,
-        "messages": messages,
+        # Calls offering tools may be followed by a tool-result call
+        "messages": _with_cache_breakpoints(messages, cache_final=bool(tools)),
         "temperature": 0.7,
-        "max_tokens": 1024
+        "max_tokens": max_tokens
     }
     
+    if stop:
+        payload["stop"] = stop
+    
     if tools:
         payload["tools"] = tools
-        payload["tool_choice"] = "auto"
+        payload["tool_choice"] = tool_choice
     
-    try:
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
+    if response_format:
+        payload["response_format"] = response_format
+    
+    return payload
+
+
+def _call_openrouter(
+    messages: list[dict],
+    tools: list[dict] | None = None,
+    response_format: dict | None = None,
+    max_tokens: int = MAX_OUTPUT_TOKENS,
+    stop: list[str] | None = None,
+    tool_choice: str = "auto"
+) -> dict:
+    """Make an API call to OpenRouter (rate limits, 5xx and timeouts are retried)."""
+    payload = _openrouter_payload(messages, tools, response_format, max_tokens, stop, tool_choice)
+    
+    # Pre-encoded body: skips httpx's stdlib json encode of the large prompt
+    body = _json_bytes(payload)
+    deadline = time.monotonic() + OPENROUTER_RETRY_BUDGET
+    
+    for attempt in range(OPENROUTER_MAX_ATTEMPTS):
+        try:
+            response = _HTTP_CLIENT.post(
                 OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
+                content=body,
+                headers={"Content-Type": "application/json"}
             )
             response.raise_for_status()
-            return response.json()
+            return _json_loads(response.content)
             
-    except httpx.TimeoutException:
-        return {"error": "timeout", "response": "La consulta tardó demasiado. Intenta de nuevo."}
-    except httpx.HTTPStatusError as e:
-        logger.error("openrouter_error", status=e.response.status_code, body=e.response.text)
-        return {"error": "api_error", "response": f"Error de API: {e.response.status_code}"}
-    except Exception as e:
-        return {"error": str(e)}
+        except httpx.TimeoutException:
+            error = {"error": "timeout", "response": "La consulta tardó demasiado. Intenta de nuevo."}
+            delay = _retry_delay(attempt)
+        except httpx.HTTPStatusError as e:
+            logger.error("openrouter_error", status=e.response.status_code, body=e.response.text)
+            error = {"error": "api_error", "response": f"Error de API: {e.response.status_code}"}
+            if e.response.status_code not in OPENROUTER_RETRY_STATUSES:
+                return error
+            delay = _retry_delay(attempt, e.response)
+        except Exception as e:
+            return {"error": str(e)}
+        
+        # Give up once the wait would overrun the retry budget
+        if attempt == OPENROUTER_MAX_ATTEMPTS - 1 or time.monotonic() + delay > deadline:
+            return error
+        
+        logger.warning("openrouter_retry", attempt=attempt + 1, delay=round(delay, 2))
+        time.sleep(delay)
+    
+    return error
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Seconds before the next attempt: the server's Retry-After, else exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    
+    return min(0.5 * 2 ** attempt, 8.0) + random.uniform(0, 0.5)
+
+
+def _stream_openrouter(
+    messages: list[dict],
+    tools: list[dict] | None = None,
+    tool_choice: str = "auto"
+) -> Iterator[dict]:
+    """
+    Streaming OpenRouter call: yields each choice's 'delta' from the SSE stream.
+    Raises httpx errors (the caller decides how to report them).
+    """
+    payload = _openrouter_payload(messages, tools, tool_choice=tool_choice)
+    payload["stream"] = True
+    
+    with _HTTP_CLIENT.stream(
+        "POST",
+        OPENROUTER_API_URL,
+        content=_json_bytes(payload),
+        headers={"Content-Type": "application/json"}
+    ) as response:
+        response.raise_for_status()
+        
+        for line in response.iter_lines():
+            # Skip blank separators and ': keep-alive' comments
+            if not line.startswith("data:"):
+                continue
+            
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            
+            chunk = _json_loads(data)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"].get("message", "stream error"))
+            
+            for choice in chunk.get("choices") or []:
+                yield choice.get("delta") or {}
 
 
 def get_service_status() -> dict:
@@ -330,6 +790,62 @@ ASSET_CONTEXT = {
 }
 
 
+# Prompt templates (str.format fields), built once at import
+_INSIGHT_PROMPT_TEMPLATE = """Genera un insight de mercado muy breve (1-2 frases) para {name}.
+
+Datos actuales:
+- Valor: {value} {unit} 
+- Cambio: {change:+.2f}%
+- Tendencia: {trend}
+
+Contexto: {context}
+
+Reglas:
+- ESCRIBE EN ESPAÑOL FINANCIERO FORMAL Y ELEGANTE.
+- PROHIBIDO USAR JERGA TIPO: "cachai", "al tiro", "fome", "bacan", "filete", "compipa".
+- Usa un tono profesional, técnico y serio (Estilo "Diario Financiero" o "Bloomberg").
+- Sé específico sobre qué significa el movimiento.
+- Máximo 30 palabras.
+- Si la tendencia es alza, explica implicancias alcistas (bullish).
+- Si la tendencia es baja, explica implicancias bajistas (bearish).
+
+Responde SOLO con el texto del insight."""
+
+_MODEL_ANALYSIS_PROMPT_TEMPLATE = """Analiza el rendimiento del modelo ML para {asset}.
+
+Datos:
+- Modelo ganador: {model_name}
+- Error porcentual (MAPE): {mape:.2f}%
+
+Genera 2 textos breves en ESPAÑOL FINANCIERO FORMAL:
+1. "selection_reason": ¿Por qué este modelo funciona mejor para este tipo de activo? (Max 25 palabras)
+2. "confidence_note": Interpreta qué tan confiable es el MAPE de {mape:.2f}% para este activo. (Max 20 palabras)
+
+Reglas:
+- TONO SERIO Y PROFESIONAL.
+- PROHIBIDO USAR JERGA (slang).
+- Usa terminología técnica correcta (volatilidad intrínseca, estocástico, etc.).
+
+Contexto técnico:
+- ARIMA/AutoARIMA: Bueno para tendencias claras.
+- Theta: Bueno para volatilidad y suavizado.
+- ETS: Bueno para estacionalidad.
+- Naive: Bueno para caminatas aleatorias (random walks).
+
+Responde SOLO en formato JSON:
+{{
+  "selection_reason": "...",
+  "confidence_note": "..."
+}}"""
+
+# Context for assets missing from ASSET_CONTEXT ('name' is filled per call)
+_DEFAULT_ASSET_INFO = {
+    "name": "",
+    "unit": "",
+    "context": "Financial asset"
+}
+
+
 def generate_chart_insight(
     asset: str,
     current_value: float | None = None,
@@ -349,38 +865,30 @@ def generate_chart_insight(
         dict with 'insight' and 'tokens_used'
     """
     if not OPENROUTER_API_KEY:
-        return {
-            "insight": "API not configured.",
-            "tokens_used": 0
-        }
+        return _NO_API_INSIGHT
     
-    # Get asset context
-    asset_info = ASSET_CONTEXT.get(asset.lower(), {
-        "name": asset.upper(),
-        "unit": "",
-        "context": "Financial asset"
-    })
+    asset_key = asset.lower()
     
-    # Build a focused prompt for short insight generation in SPANISH
-    prompt = f"""Genera un insight de mercado muy breve (1-2 frases) para {asset_info['name']}.
-
-Datos actuales:
-- Valor: {current_value} {asset_info['unit']} 
-- Cambio: {change_percent:+.2f}%
-- Tendencia: {trend}
-
-Contexto: {asset_info['context']}
-
-Reglas:
-- ESCRIBE EN ESPAÑOL FINANCIERO FORMAL Y ELEGANTE.
-- PROHIBIDO USAR JERGA TIPO: "cachai", "al tiro", "fome", "bacan", "filete", "compipa".
-- Usa un tono profesional, técnico y serio (Estilo "Diario Financiero" o "Bloomberg").
-- Sé específico sobre qué significa el movimiento.
-- Máximo 30 palabras.
-- Si la tendencia es alza, explica implicancias alcistas (bullish).
-- Si la tendencia es baja, explica implicancias bajistas (bearish).
-
-Responde SOLO con el texto del insight."""
+    # Keyed on the exact-match fields plus the change at 0.1% granularity
+    cache_key = (asset_key, trend, round(change_percent, 1))
+    cached = _insight_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "tokens_used": 0}
+    
+    # Get asset context (generic entry named after the asset if unknown)
+    asset_info = ASSET_CONTEXT.get(asset_key)
+    if asset_info is None:
+        asset_info = {**_DEFAULT_ASSET_INFO, "name": asset.upper()}
+    
+    # Focused prompt for short insight generation in SPANISH
+    prompt = _INSIGHT_PROMPT_TEMPLATE.format(
+        name=asset_info['name'],
+        value=current_value,
+        unit=asset_info['unit'],
+        change=change_percent,
+        trend=trend,
+        context=asset_info['context']
+    )
 
     try:
         messages = [
@@ -388,38 +896,65 @@ Responde SOLO con el texto del insight."""
             {"role": "user", "content": prompt}
         ]
         
-        response = _call_openrouter(messages, tools=None)
+        # 1-2 sentences: cap decoding and stop at the first paragraph break
+        response = _call_openrouter(messages, tools=None, max_tokens=INSIGHT_MAX_TOKENS, stop=["\n\n"])
         
         if "error" in response:
             # Fallback to static insight
             return _get_fallback_insight(asset, change_percent, trend)
         
-        return {
+        result = {
             "insight": response["choices"][0]["message"]["content"].strip(),
             "tokens_used": response["usage"]["total_tokens"]
         }
+        _insight_cache.set(cache_key, result)
+        
+        return result
         
     except Exception as e:
         logger.error("insight_generation_error", error=str(e))
         return _get_fallback_insight(asset, change_percent, trend)
 
 
+def generate_chart_insights_batch(items: list[dict]) -> dict[str, dict]:
+    """
+    Generate insights for several chart cards concurrently.
+    
+    Args:
+        items: generate_chart_insight keyword dicts (each with an 'asset' key)
+    
+    Returns:
+        dict mapping each asset to its 'insight' / 'tokens_used' result
+    """
+    if not items:
+        return {}
+    
+    # Bounded to stay within OpenRouter's per-key concurrency
+    with ThreadPoolExecutor(max_workers=min(len(items), INSIGHT_BATCH_CONCURRENCY)) as executor:
+        results = executor.map(lambda item: generate_chart_insight(**item), items)
+        return {item["asset"]: result for item, result in zip(items, results)}
+
+
+# Static insights (IN SPANISH) used when the LLM call fails
+_FALLBACK_INSIGHTS = {
+    "gold": "El oro mantiene su rol como activo refugio ante la incertidumbre global.",
+    "copper": "La demanda de cobre sigue siendo un indicador clave de la actividad industrial.",
+    "oil": "El precio del crudo refleja las tensiones en la cadena de suministro energética.",
+    "btc": "Bitcoin continúa demostrando alta volatilidad correlacionada con activos de riesgo.",
+    "eth": "Ethereum consolida su posición como infraestructura clave para finanzas descentralizadas.",
+    "cpi": "La inflación persistente presiona a la Reserva Federal a mantener tasas altas.",
+    "yields": "El rendimiento de los bonos del Tesoro impacta el costo del crédito global.",
+    "usdclp": "Termómetro del peso. Sensible al precio del cobre y tasas Fed.",
+    "uf": "Unidad indexada a la inflación. Referencia para créditos y arriendos."
+}
+
+_TREND_EMOJI = {"up": "📈", "down": "📉", "stable": "➡️"}
+
+
 def _get_fallback_insight(asset: str, change_percent: float, trend: str) -> dict:
     """Return a static fallback insight if LLM fails (IN SPANISH)."""
-    fallbacks = {
-        "gold": "El oro mantiene su rol como activo refugio ante la incertidumbre global.",
-        "copper": "La demanda de cobre sigue siendo un indicador clave de la actividad industrial.",
-        "oil": "El precio del crudo refleja las tensiones en la cadena de suministro energética.",
-        "btc": "Bitcoin continúa demostrando alta volatilidad correlacionada con activos de riesgo.",
-        "eth": "Ethereum consolida su posición como infraestructura clave para finanzas descentralizadas.",
-        "cpi": "La inflación persistente presiona a la Reserva Federal a mantener tasas altas.",
-        "yields": "El rendimiento de los bonos del Tesoro impacta el costo del crédito global.",
-        "usdclp": "Termómetro del peso. Sensible al precio del cobre y tasas Fed.",
-        "uf": "Unidad indexada a la inflación. Referencia para créditos y arriendos."
-    }
-    
-    base = fallbacks.get(asset.lower(), "Indicador de mercado financiero.")
-    direction = "📈" if trend == "up" else "📉" if trend == "down" else "➡️"
+    base = _FALLBACK_INSIGHTS.get(asset.lower(), "Indicador de mercado financiero.")
+    direction = _TREND_EMOJI.get(trend, "➡️")
     
     return {
         "insight": f"{direction} {base}",
@@ -448,32 +983,12 @@ def generate_model_analysis(
     
     mape = metrics.get('mape', 0)
     
-    prompt = f"""Analiza el rendimiento del modelo ML para {asset}.
-
-Datos:
-- Modelo ganador: {model_name}
-- Error porcentual (MAPE): {mape:.2f}%
-
-Genera 2 textos breves en ESPAÑOL FINANCIERO FORMAL:
-1. "selection_reason": ¿Por qué este modelo funciona mejor para este tipo de activo? (Max 25 palabras)
-2. "confidence_note": Interpreta qué tan confiable es el MAPE de {mape:.2f}% para este activo. (Max 20 palabras)
-
-Reglas:
-- TONO SERIO Y PROFESIONAL.
-- PROHIBIDO USAR JERGA (slang).
-- Usa terminología técnica correcta (volatilidad intrínseca, estocástico, etc.).
-
-Contexto técnico:
-- ARIMA/AutoARIMA: Bueno para tendencias claras.
-- Theta: Bueno para volatilidad y suavizado.
-- ETS: Bueno para estacionalidad.
-- Naive: Bueno para caminatas aleatorias (random walks).
-
-Responde SOLO en formato JSON:
-{{
-  "selection_reason": "...",
-  "confidence_note": "..."
-}}"""
+    cache_key = (asset, model_name, round(mape, 1))
+    cached = _model_analysis_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "tokens_used": 0}
+    
+    prompt = _MODEL_ANALYSIS_PROMPT_TEMPLATE.format(asset=asset, model_name=model_name, mape=mape)
 
     try:
         messages = [
@@ -481,25 +996,33 @@ Responde SOLO en formato JSON:
             {"role": "user", "content": prompt}
         ]
         
-        response = _call_openrouter(messages, tools=None)
+        response = _call_openrouter(
+            messages,
+            tools=None,
+            response_format={"type": "json_object"},
+            max_tokens=MODEL_ANALYSIS_MAX_TOKENS
+        )
         
         if "error" in response:
             return _get_fallback_model_analysis(asset, model_name)
             
-        content = response["choices"][0]["message"]["content"].strip()
+        content = response["choices"][0]["message"]["content"]
         
-        # Clean markdown code blocks if present
-        if content.startswith("```json"):
-            content = content.replace("```json", "").replace("```", "")
+        # The JSON object itself, whatever fences or prose surround it
+        match = _JSON_BLOCK_RE.search(content)
+        if match is None:
+            raise ValueError("No JSON object in model analysis response")
         
-        import json
-        result = json.loads(content)
+        result = _json_loads(match.group(0))
         
-        return {
+        analysis = {
             "selection_reason": result.get("selection_reason", ""),
             "confidence_note": result.get("confidence_note", ""),
             "tokens_used": response.get("usage", {}).get("total_tokens", 0)
         }
+        _model_analysis_cache.set(cache_key, analysis)
+        
+        return analysis
         
     except Exception as e:
         logger.error("model_analysis_error", error=str(e))
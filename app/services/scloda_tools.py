@@ -5,9 +5,55 @@ These tools are exposed to the LLM via OpenRouter's function calling mechanism.
 Each tool queries internal APIs and returns structured data for Scloda to explain.
 """
 import os
-from datetime import datetime, timedelta
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from datetime import date, datetime, timedelta
 from typing import Any
 
+from app.services.crypto import get_buda_ticker
+from app.services.fred import get_fred_series
+from app.services.ttl_cache import TTLCache
+
+# The BDE client lives in the ML package; without it the UF/USD-CLP tools
+# report an error instead of failing the import
+try:
+    from app.ml.ingest.bde_client import fetch_uf, fetch_usdclp
+    BDE_CLIENT_AVAILABLE = True
+except ImportError:
+    BDE_CLIENT_AVAILABLE = False
+
+# orjson is optional; the stdlib json module is used without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Seconds a tool result is reused: fiat/commodity series move at most
+# daily, crypto tickers within minutes
+MARKET_DATA_CACHE_TTL = 3600
+CRYPTO_CACHE_TTL = 60
+
+
+def _ttl_cached(ttl: float):
+    """Memoize a data tool on its positional arguments; error results are not cached."""
+    def decorator(fn):
+        cache = TTLCache(maxsize=128, ttl=ttl)
+        
+        @wraps(fn)
+        def wrapper(*args):
+            result = cache.get(args)
+            if result is None:
+                result = fn(*args)
+                if "error" not in result:
+                    cache.set(args, result)
+            return result
+        
+        return wrapper
+    return decorator
+
+
 # Tool definitions for OpenRouter function calling
 SCLODA_TOOLS = [
     {
@@ -131,6 +177,35 @@ SCLODA_TOOLS = [
     }
 ]
 
+
+def _slim_tool(tool: dict) -> dict:
+    """
+    Copy of a tool definition without parameter descriptions and with the
+    function description cut to its first sentence; names, types, enums and
+    required fields are kept.
+    """
+    function = tool["function"]
+    parameters = function["parameters"]
+    return {
+        "type": tool["type"],
+        "function": {
+            "name": function["name"],
+            "description": function["description"].split(". ", 1)[0].rstrip(".") + ".",
+            "parameters": {
+                **parameters,
+                "properties": {
+                    name: {k: v for k, v in spec.items() if k != "description"}
+                    for name, spec in parameters["properties"].items()
+                }
+            }
+        }
+    }
+
+
+# Compact tool definitions for follow-up turns (the full ones went out on the
+# conversation's first turn)
+SCLODA_TOOLS_SLIM = [_slim_tool(tool) for tool in SCLODA_TOOLS]
+
 # Indicator explanations (static knowledge)
 INDICATOR_EXPLANATIONS = {
     "uf": {
@@ -199,38 +274,82 @@ INDICATOR_EXPLANATIONS = {
 }
 
 
-def execute_tool(tool_name: str, arguments: dict) -> dict[str, Any]:
+# Model info per asset (static demo data - in production would query model registry)
+MODEL_DATA = {
+    "GOLD": {"model": "Auto ARIMA", "mae": 12.5, "rmse": 15.2, "mape": 0.65, "confidence": "excellent"},
+    "COPPER": {"model": "Theta", "mae": 180, "rmse": 220, "mape": 6.14, "confidence": "volatile"},
+    "OIL": {"model": "Naive", "mae": 1.2, "rmse": 1.8, "mape": 1.92, "confidence": "excellent"},
+    "USDCLP": {"model": "Auto ARIMA", "mae": 8.5, "rmse": 12.3, "mape": 4.22, "confidence": "good"},
+    "UF": {"model": "ARIMA(0,2,2)", "mae": 250, "rmse": 253, "mape": 0.63, "confidence": "excellent"},
+    "BTC": {"model": "Auto ARIMA", "mae": 2500, "rmse": 3200, "mape": 8.5, "confidence": "volatile"},
+    "ETH": {"model": "Auto ARIMA", "mae": 180, "rmse": 240, "mape": 9.2, "confidence": "volatile"}
+}
+
+# Model explanations
+MODEL_EXPLANATIONS = {
+    "Auto ARIMA": "Modelo que automáticamente encuentra la mejor combinación de valores pasados para predecir el futuro.",
+    "Theta": "Método que descompone y suaviza la serie. Bueno para activos volátiles.",
+    "Naive": "Usa el último valor como predicción. Sorprendentemente efectivo para algunos activos.",
+    "ARIMA(0,2,2)": "Modelo ARIMA específico para series con tendencia fuerte y predecible."
+}
+
+# Confidence level -> meaning shown to the user
+CONFIDENCE_MEANING = {
+    "excellent": "Alta confiabilidad. El modelo predice muy bien este activo.",
+    "good": "Buena confiabilidad. Predicciones útiles pero con margen de error.",
+    "volatile": "Activo muy volátil. Las predicciones son orientativas, no definitivas."
+}
+
+
+# Tool name -> handler taking the parsed arguments dict
+_DISPATCH = {
+    "get_uf_data": lambda args: _get_uf_data(int(args.get("days", 30))),
+    "get_usdclp_data": lambda args: _get_usdclp_data(int(args.get("days", 30))),
+    "get_commodity_data": lambda args: _get_commodity_data(args["commodity"], int(args.get("days", 30))),
+    "get_crypto_data": lambda args: _get_crypto_data(args["crypto"]),
+    "get_model_info": lambda args: _get_model_info(args["asset"]),
+    "get_market_summary": lambda args: _get_market_summary(),
+    "explain_indicator": lambda args: _explain_indicator(args["indicator"])
+}
+
+
+def execute_tool(tool_name: str, arguments: dict | str | bytes) -> dict[str, Any]:
     """
     Execute a tool and return its result.
     This is called by the chat service when the LLM requests a function call.
+    Arguments may be the raw JSON string from the tool call; it is parsed here.
     """
+    handler = _DISPATCH.get(tool_name)
+    if handler is None:
+        return {"error": f"Unknown tool: {tool_name}"}
+    
     try:
-        if tool_name == "get_uf_data":
-            return _get_uf_data(arguments.get("days", 30))
-        elif tool_name == "get_usdclp_data":
-            return _get_usdclp_data(arguments.get("days", 30))
-        elif tool_name == "get_commodity_data":
-            return _get_commodity_data(arguments["commodity"], arguments.get("days", 30))
-        elif tool_name == "get_crypto_data":
-            return _get_crypto_data(arguments["crypto"])
-        elif tool_name == "get_model_info":
-            return _get_model_info(arguments["asset"])
-        elif tool_name == "get_market_summary":
-            return _get_market_summary()
-        elif tool_name == "explain_indicator":
-            return _explain_indicator(arguments["indicator"])
-        else:
-            return {"error": f"Unknown tool: {tool_name}"}
+        if isinstance(arguments, (str, bytes)):
+            # Some providers send "" for tools without parameters
+            if not arguments.strip():
+                arguments = {}
+            else:
+                arguments = orjson.loads(arguments) if ORJSON_AVAILABLE else json.loads(arguments)
+        
+        return handler(arguments)
     except Exception as e:
         return {"error": str(e)}
 
 
+def _date_window(days: int) -> tuple[str, str]:
+    """(end, start) ISO dates for the last `days` days, stable within a day."""
+    today = date.today()
+    return today.isoformat(), (today - timedelta(days=days)).isoformat()
+
+
+@_ttl_cached(MARKET_DATA_CACHE_TTL)
 def _get_uf_data(days: int = 30) -> dict:
     """Fetch UF data from internal API."""
+    if not BDE_CLIENT_AVAILABLE:
+        return {"error": "BDE client unavailable", "indicator": "UF"}
+    
     try:
-        from app.ml.ingest.bde_client import fetch_uf
-        end = datetime.now().strftime("%Y-%m-%d")
-        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        end, start = _date_window(days)
         df = fetch_uf(start_date=start, end_date=end, aggregate_monthly=False)
         
         if df.empty:
@@ -253,12 +372,14 @@ def _get_uf_data(days: int = 30) -> dict:
         return {"error": str(e), "indicator": "UF"}
 
 
+@_ttl_cached(MARKET_DATA_CACHE_TTL)
 def _get_usdclp_data(days: int = 30) -> dict:
     """Fetch USD/CLP data from internal API."""
+    if not BDE_CLIENT_AVAILABLE:
+        return {"error": "BDE client unavailable", "indicator": "USD/CLP"}
+    
     try:
-        from app.ml.ingest.bde_client import fetch_usdclp
-        end = datetime.now().strftime("%Y-%m-%d")
-        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        end, start = _date_window(days)
         df = fetch_usdclp(start_date=start, end_date=end, aggregate_monthly=False)
         
         if df.empty:
@@ -281,6 +402,7 @@ def _get_usdclp_data(days: int = 30) -> dict:
         return {"error": str(e), "indicator": "USD/CLP"}
 
 
+@_ttl_cached(MARKET_DATA_CACHE_TTL)
 def _get_commodity_data(commodity: str, days: int = 30) -> dict:
     """Fetch commodity data from FRED."""
     # FRED series IDs for commodities
@@ -299,7 +421,6 @@ def _get_commodity_data(commodity: str, days: int = 30) -> dict:
     }
     
     try:
-        from app.services.fred import get_fred_series
         series_id = series_map.get(commodity)
         if not series_id:
             return {"error": f"Unknown commodity: {commodity}"}
@@ -326,11 +447,10 @@ def _get_commodity_data(commodity: str, days: int = 30) -> dict:
         return {"error": str(e), "commodity": commodity}
 
 
+@_ttl_cached(CRYPTO_CACHE_TTL)
 def _get_crypto_data(crypto: str) -> dict:
     """Fetch crypto data from Buda API."""
     try:
-        from app.services.crypto import get_buda_ticker
-        
         market = f"{crypto.upper()}-CLP"
         data = get_buda_ticker(market)
         
@@ -349,44 +469,22 @@ def _get_crypto_data(crypto: str) -> dict:
 
 def _get_model_info(asset: str) -> dict:
     """Get ML model info for an asset."""
-    # Demo data - in production would query model registry
-    model_data = {
-        "GOLD": {"model": "Auto ARIMA", "mae": 12.5, "rmse": 15.2, "mape": 0.65, "confidence": "excellent"},
-        "COPPER": {"model": "Theta", "mae": 180, "rmse": 220, "mape": 6.14, "confidence": "volatile"},
-        "OIL": {"model": "Naive", "mae": 1.2, "rmse": 1.8, "mape": 1.92, "confidence": "excellent"},
-        "USDCLP": {"model": "Auto ARIMA", "mae": 8.5, "rmse": 12.3, "mape": 4.22, "confidence": "good"},
-        "UF": {"model": "ARIMA(0,2,2)", "mae": 250, "rmse": 253, "mape": 0.63, "confidence": "excellent"},
-        "BTC": {"model": "Auto ARIMA", "mae": 2500, "rmse": 3200, "mape": 8.5, "confidence": "volatile"},
-        "ETH": {"model": "Auto ARIMA", "mae": 180, "rmse": 240, "mape": 9.2, "confidence": "volatile"}
-    }
-    
-    info = model_data.get(asset.upper())
+    key = asset.upper()
+    info = MODEL_DATA.get(key)
     if not info:
         return {"error": f"No model for {asset}"}
     
-    # Model explanations
-    model_explanations = {
-        "Auto ARIMA": "Modelo que automáticamente encuentra la mejor combinación de valores pasados para predecir el futuro.",
-        "Theta": "Método que descompone y suaviza la serie. Bueno para activos volátiles.",
-        "Naive": "Usa el último valor como predicción. Sorprendentemente efectivo para algunos activos.",
-        "ARIMA(0,2,2)": "Modelo ARIMA específico para series con tendencia fuerte y predecible."
-    }
-    
     return {
-        "asset": asset.upper(),
+        "asset": key,
         "model_name": info["model"],
-        "model_explanation": model_explanations.get(info["model"], "Modelo de series de tiempo"),
+        "model_explanation": MODEL_EXPLANATIONS.get(info["model"], "Modelo de series de tiempo"),
         "metrics": {
             "mae": info["mae"],
             "rmse": info["rmse"],
             "mape": info["mape"]
         },
         "confidence": info["confidence"],
-        "confidence_meaning": {
-            "excellent": "Alta confiabilidad. El modelo predice muy bien este activo.",
-            "good": "Buena confiabilidad. Predicciones útiles pero con margen de error.",
-            "volatile": "Activo muy volátil. Las predicciones son orientativas, no definitivas."
-        }.get(info["confidence"])
+        "confidence_meaning": CONFIDENCE_MEANING.get(info["confidence"])
     }
 
 
@@ -397,19 +495,18 @@ def _get_market_summary() -> dict:
         "indicators": []
     }
     
-    # Get each indicator
-    uf = _get_uf_data(7)
-    if "error" not in uf:
-        summary["indicators"].append(uf)
+    # Independent network fetches: run them concurrently, keep this order
+    fetches = [
+        partial(_get_uf_data, 7),
+        partial(_get_usdclp_data, 7),
+        *(partial(_get_commodity_data, commodity, 7) for commodity in ["gold", "copper", "oil"])
+    ]
     
-    usdclp = _get_usdclp_data(7)
-    if "error" not in usdclp:
-        summary["indicators"].append(usdclp)
+    with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+        futures = [executor.submit(fetch) for fetch in fetches]
+        results = [future.result() for future in futures]
     
-    for commodity in ["gold", "copper", "oil"]:
-        data = _get_commodity_data(commodity, 7)
-        if "error" not in data:
-            summary["indicators"].append(data)
+    summary["indicators"] = [data for data in results if "error" not in data]
     
     return summary
 
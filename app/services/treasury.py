@@ -3,12 +3,45 @@ Service to fetch US Treasury Yields (DGS10).
 Source: US Treasury Fiscal Data API (public).
 Dataset: daily_treasury_yield_curve
 """
-import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from app.services.http import get_default_client
+
+# orjson is optional; without it responses are decoded by response.json()
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 TREASURY_API_URL = "https://api.fiscaldata.treasury.gov/services/api/fiscal_service/v2/accounting/od/daily_treasury_yield_curve"
 
+# The yield curve is published once per business day; cache responses for 12h
+TREASURY_CACHE_TTL = 12 * 3600
+
+# Rows per API page (the endpoint's maximum)
+TREASURY_PAGE_SIZE = 10000
+
+def _monthly_mean(dates: pd.Series, values: pd.Series) -> pd.DataFrame:
+    """
+    Month-end means, like resample('ME').mean(): one groupby on
+    datetime64[M] keys, with months lacking data kept as NaN.
+    """
+    months = dates.to_numpy().astype('datetime64[M]')
+    if len(months) == 0:
+        return pd.DataFrame({'date': dates.iloc[:0], 'value': values.iloc[:0]})
+    
+    span = np.arange(months.min(), months.max() + 1)
+    means = pd.Series(values.to_numpy()).groupby(months).mean().reindex(span)
+    
+    # Label each month by its last day
+    month_end = ((span + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')).astype(dates.dtype)
+    
+    return pd.DataFrame({'date': month_end, 'value': means.to_numpy()})
+
+
 def fetch_treasury_yields(start_date='2023-01-01'):
     """
     Fetches 10-Year Treasury Yields (DGS10 equivalent).
@@ -16,27 +49,38 @@ def fetch_treasury_yields(start_date='2023-01-01'):
     params = {
         'fields': 'record_date,tc_10year',
         'filter': f'record_date:gte:{start_date}',
-        'page[size]': 10000
+        'page[size]': TREASURY_PAGE_SIZE
     }
     
     try:
-        response = requests.get(TREASURY_API_URL, params=params, timeout=10)
-        response.raise_for_status()
-        json_data = response.json()
+        # Page through the result; rows are collected and framed once
+        data = []
+        page = 1
+        while True:
+            # Shared pooled (keep-alive, gzip, retrying) client instead of a new connection per call
+            response = get_default_client().get(
+                TREASURY_API_URL,
+                params={**params, 'page[number]': page},
+                expire_after=TREASURY_CACHE_TTL
+            )
+            json_data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+            
+            data.extend(json_data['data'])
+            if page >= json_data.get('meta', {}).get('total-pages', 1):
+                break
+            page += 1
         
-        data = json_data['data']
-        df = pd.DataFrame(data)
+        df = pd.DataFrame.from_records(data, columns=['record_date', 'tc_10year'])
         
-        # Parse
-        df['date'] = pd.to_datetime(df['record_date'])
-        df['value'] = pd.to_numeric(df['tc_10year'])
+        # Parse (the API reports missing yields as the string "null")
+        df['date'] = pd.to_datetime(df['record_date'], format='%Y-%m-%d', cache=True)
+        df['value'] = pd.to_numeric(df['tc_10year'], errors='coerce')
         df['series_id'] = 'DGS10'
         df['source'] = 'TREASURY'
         df = df.dropna(subset=['value'])
         
         # Aggregate to monthly? Brief says: "yields diarios agregados a promedio mensual"
-        df.set_index('date', inplace=True)
-        monthly = df['value'].resample('ME').mean().reset_index() # 'M' is deprecated, 'ME' for month end
+        monthly = _monthly_mean(df['date'], df['value'])
         
         monthly['series_id'] = 'DGS10'
         monthly['source'] = 'TREASURY'
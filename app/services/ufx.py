@@ -1,46 +1,103 @@
 """
 Service for UF (Unidad de Fomento) conversion.
 """
+import numpy as np
 import pandas as pd
 
+# Numba is optional; the UF lookup falls back to NumPy searchsorted without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# int64 view of NaT, the "no UF" marker for matched dates
+_NAT_I8 = np.iinfo(np.int64).min
+
 def attach_uf(df_metrics: pd.DataFrame, df_uf: pd.DataFrame) -> pd.DataFrame:
     """
     Attaches UF value to metrics dataframe based on date.
     
+    Each row gets the UF of its date, or the latest earlier one (backward
+    as-of match), found with a binary search over the sorted UF dates.
+    
     Args:
         df_metrics: DF with 'date' and 'cta_anual_clp'
         df_uf: DF with 'fecha' and 'valor'
     Returns:
-        DF with 'cta_anual_uf' and 'uf_valor_used'
+        DF sorted by date with 'fecha' (UF date matched), 'uf_val_used'
+        and 'cta_anual_uf'; NaN where no UF precedes the date
     """
-    out = df_metrics.copy()
-    
     # Ensure types to nanosecond precision
-    out['date'] = pd.to_datetime(out['date']).astype('datetime64[ns]')
-    df_uf['fecha'] = pd.to_datetime(df_uf['fecha']).astype('datetime64[ns]')
-    
-    # Sort UF by date
-    df_uf = df_uf.sort_values('fecha')
+    dates = pd.to_datetime(df_metrics['date']).astype('datetime64[ns]')
+    out = df_metrics.assign(date=dates)
+    if not dates.is_monotonic_increasing:
+        out = out.take(np.argsort(dates.to_numpy(), kind='stable'))
+    out = out.reset_index(drop=True)
     
-    # Merge asof to get nearest UF (or exact)
-    # direction='backward' means if exact match not found, take previous valid UF.
-    # tolerance? 
-    # For 'fecha_captura', we want the UF of that day.
+    # Sorted UF dates/values (undated rows cannot be matched)
+    uf_dates = pd.to_datetime(df_uf['fecha']).astype('datetime64[ns]').to_numpy()
+    uf_values = df_uf['valor'].to_numpy()
+    valid = ~np.isnat(uf_dates)
+    uf_dates, uf_values = uf_dates[valid], uf_values[valid]
+    order = np.argsort(uf_dates, kind='stable')
+    uf_dates, uf_values = uf_dates[order], uf_values[order]
     
-    merged = pd.merge_asof(
-        out.sort_values('date'),
-        df_uf[['fecha', 'valor']],
-        left_on='date',
-        right_on='fecha',
-        direction='backward'
-    )
+    metric_dates = out['date'].to_numpy()
     
-    # Rename
-    merged = merged.rename(columns={'valor': 'uf_val_used'})
+    if NUMBA_AVAILABLE and uf_values.dtype == np.float64:
+        fecha_i8, uf_val = _uf_lookup_kernel(uf_dates.view('i8'), uf_values, metric_dates.view('i8'))
+        fecha = fecha_i8.view('datetime64[ns]')
+    else:
+        # Last UF date <= each metric date, compared as int64 nanoseconds
+        idx = np.searchsorted(uf_dates.view('i8'), metric_dates.view('i8'), side='right') - 1
+        matched = idx >= 0
+        
+        if matched.all():
+            fecha, uf_val = uf_dates[idx], uf_values[idx]
+        elif len(uf_dates) == 0:
+            fecha = np.full(len(idx), np.datetime64('NaT', 'ns'))
+            uf_val = np.full(len(idx), np.nan)
+        else:
+            fecha = np.where(matched, uf_dates[idx], np.datetime64('NaT', 'ns'))
+            uf_val = np.where(matched, uf_values[idx], np.nan)
     
-    # Compute
-    merged['cta_anual_uf'] = merged['cta_anual_clp'] / merged['uf_val_used']
-    
-    # Drop temp cols if needed
-    
-    return merged
+    # New columns from arrays in one assign; existing columns are not copied
+    return out.assign(
+        fecha=fecha,
+        uf_val_used=uf_val,
+        cta_anual_uf=out['cta_anual_clp'] / uf_val
+    )
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _uf_lookup_kernel(uf_dates, uf_values, dates):
+        """
+        Backward as-of lookup over int64 nanoseconds: for each date, the last
+        UF date <= it (binary search) and its value, NaT/NaN when none.
+        """
+        n = dates.shape[0]
+        fecha = np.empty(n, dtype=np.int64)
+        uf_val = np.empty(n)
+        
+        for i in range(n):
+            d = dates[i]
+            lo = 0
+            hi = uf_dates.shape[0]
+            # NaT is the int64 minimum, so it never finds a UF date
+            while lo < hi:
+                mid = (lo + hi) >> 1
+                if uf_dates[mid] <= d:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            
+            if lo > 0:
+                fecha[i] = uf_dates[lo - 1]
+                uf_val[i] = uf_values[lo - 1]
+            else:
+                fecha[i] = _NAT_I8
+                uf_val[i] = np.nan
+        
+        return fecha, uf_val
@@ -15,7 +15,7 @@ CREATE TABLE IF NOT EXISTS macro_indicators (
     id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
     series_id VARCHAR(50) NOT NULL,
-    value NUMERIC(10, 4),
+    value DOUBLE PRECISION,
     source VARCHAR(50),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(date, series_id)
@@ -1,7 +1,7 @@
-import pandas as pd
+import pyarrow.parquet as pq
 import os
 
-def inspect_parquet(directory='data'):
+def inspect_parquet(directory='data', columns=None):
     print(f"\n{'='*50}\nInspeccionando archivos Parquet en '{directory}'\n{'='*50}")
     
     if not os.path.exists(directory):
@@ -17,18 +17,37 @@ def inspect_parquet(directory='data'):
     for f in files:
         path = os.path.join(directory, f)
         try:
-            df = pd.read_parquet(path)
+            # Shape and dtypes come from the footer; only the first rows are decoded
+            pf = pq.ParquetFile(path)
+            names = pf.schema_arrow.names
+            if columns:
+                # Keep stored index columns so the preview shows the index
+                index_cols = (pf.schema_arrow.pandas_metadata or {}).get('index_columns', [])
+                names = [c for c in names if c in columns or c in index_cols]
+            empty = pf.schema_arrow.empty_table().select(names).to_pandas()
+            
+            batch = next(pf.iter_batches(batch_size=5, columns=names), None)
+            head = batch.to_pandas() if batch is not None else empty
+            
             print(f"\n📄 ARCHIVO: {f}")
             print(f"{'-'*len(f)}")
-            print(f"Dimensiones: {df.shape}")
-            print(f"Columnas: {df.columns.tolist()}")
+            print(f"Dimensiones: {(pf.metadata.num_rows, len(empty.columns))}")
+            print(f"Columnas: {empty.columns.tolist()}")
             print("\n🔍 Primeras 5 filas:")
-            print(df.head().to_string())
+            print(head.to_string())
             print("\n📊 Info de tipos:")
-            print(df.dtypes)
+            print(head.dtypes)
             print("\n" + "="*30)
         except Exception as e:
             print(f"Error leyendo {f}: {e}")
 
 if __name__ == "__main__":
-    inspect_parquet()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Inspect Parquet files")
+    parser.add_argument("--dir", default="data", help="Directory with Parquet files")
+    parser.add_argument("--columns", nargs="+", help="Only show these columns")
+    
+    args = parser.parse_args()
+    
+    inspect_parquet(args.dir, args.columns)
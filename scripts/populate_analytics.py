@@ -1,9 +1,24 @@
 import os
 import sys
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import json
 from datetime import datetime
 
+# orjson is optional; the stdlib json writer is the fallback
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Only columns the analytics step reads ('cta_anual_clp' may be absent)
+RANKING_COLUMNS = ['institucion', 'cta_anual_clp']
+
+# Institution types, alphabetical so the categorical sorts by name
+INSTITUTION_TYPES = ['Cooperative', 'Retail / Modern', 'Traditional Bank']
+
 # Setup
 os.makedirs('data/analytics', exist_ok=True)
 
@@ -16,34 +31,51 @@ def run_analytics_step():
         print("   ⚠️ Ranking data not found. Skipping.")
         return
 
-    df = pd.read_parquet(ranking_path)
+    # Project to the used columns, checked against the footer schema;
+    # institution names stay dictionary-encoded (a categorical in pandas)
+    available = set(pq.read_schema(ranking_path).names)
+    df = pq.read_table(
+        ranking_path,
+        columns=[c for c in RANKING_COLUMNS if c in available],
+        read_dictionary=['institucion']
+    ).to_pandas()
     print(f"   -> Loaded {len(df)} records from {ranking_path}")
 
     # 2. Market Composition (Pie Chart Data)
     # Group by Institution Type (inferred from name or manually mapped)
     # Simple Logic: Map known banks to 'Bank', others to 'Cooperative' or 'Retail'
     
-    def classify_inst(name):
-        name = name.upper()
-        if 'BANCO' in name or 'BICE' in name or 'SCOTIABANK' in name:
-            return 'Traditional Bank'
-        if 'COO' in name or 'COOPERATIVA' in name:
-            return 'Cooperative'
-        return 'Retail / Modern'
-
-    df['type'] = df['institucion'].apply(classify_inst)
+    # Classify each distinct name once, then map rows through the category
+    # codes; the trailing None is what missing names (code -1) pick up.
+    # Bank names win over 'COO'; everything else is Retail / Modern
+    inst = df['institucion'].astype('category')
+    names = pd.Series([*inst.cat.categories, None], dtype=object)
+    up = names.str.upper()
+    is_bank = up.str.contains('BANCO|BICE|SCOTIABANK', regex=True).to_numpy(dtype=bool)
+    is_coop = up.str.contains('COO', regex=False).to_numpy(dtype=bool)
+    name_types = np.select([is_bank, is_coop], [2, 0], default=1)
+    df['type'] = pd.Categorical.from_codes(name_types[inst.cat.codes.to_numpy()], categories=INSTITUTION_TYPES)
     
-    # Composition by Type
-    comp = df['type'].value_counts().reset_index()
+    # Composition and Cost Efficiency by Type from one groupby pass: row
+    # count ('size', NaN costs included) and mean cost per type
+    # Assuming 'cta_anual_clp' exists
+    has_cost = 'cta_anual_clp' in df.columns
+    grouped = df.groupby('type', sort=False, observed=True)
+    if has_cost:
+        stats = grouped['cta_anual_clp'].agg(['size', 'mean'])
+    else:
+        stats = grouped.size().to_frame('size')
+    
+    # Composition: most frequent first, like value_counts (ties in first-seen order)
+    comp = stats['size'].sort_values(ascending=False, kind='stable').reset_index()
     comp.columns = ['type', 'count']
     
     # Save as JSON for frontend
     comp_data = comp.to_dict('records')
     
-    # 3. Cost Efficiency by Type (Avg Cost by Type)
-    # Assuming 'cta_anual_clp' exists
-    if 'cta_anual_clp' in df.columns:
-        efficiency = df.groupby('type')['cta_anual_clp'].mean().reset_index()
+    # 3. Cost Efficiency by Type (Avg Cost by Type), ordered by type name
+    if has_cost:
+        efficiency = stats['mean'].sort_index().reset_index()
         efficiency.columns = ['type', 'avg_cost']
         eff_data = efficiency.to_dict('records')
     else:
@@ -56,8 +88,12 @@ def run_analytics_step():
     }
     
     out_path = 'data/analytics/dashboard_insights.json'
-    with open(out_path, 'w') as f:
-        json.dump(analytics_payload, f, indent=2)
+    if ORJSON_AVAILABLE:
+        with open(out_path, 'wb') as f:
+            f.write(orjson.dumps(analytics_payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(out_path, 'w') as f:
+            json.dump(analytics_payload, f, indent=2)
     
     print(f"   -> Analytics saved to {out_path}")
 
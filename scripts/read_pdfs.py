@@ -1,14 +1,15 @@
 from pypdf import PdfReader
 import os
+import sys
 
 def extract_text(filename):
     print(f"\n{'='*20}\nReading {filename}\n{'='*20}")
     try:
         reader = PdfReader(filename)
-        text = ""
+        # Write page by page: the whole document is never held as one string
         for page in reader.pages:
-            text += page.extract_text() + "\n"
-        print(text)
+            sys.stdout.write((page.extract_text() or "") + "\n")
+        sys.stdout.write("\n")
     except Exception as e:
         print(f"Error reading {filename}: {e}")
 
@@ -7,12 +7,16 @@ Speed optimizations:
 - n_jobs=-1 for parallel model training
 - turbo=True to skip slow models  
 - Include only fast, reliable models
-- Parallel asset training with ThreadPoolExecutor
+- Parallel asset training with ProcessPoolExecutor (one process per asset)
 """
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
+from importlib import metadata
 from pathlib import Path
 from typing import Optional
 import warnings
@@ -22,6 +26,9 @@ warnings.filterwarnings('ignore')
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -78,6 +85,19 @@ FAST_MODELS = [
     "lr_cds_dt",   # Linear regression - fast
 ]
 
+# Finished results per (asset, input data, settings); unchanged assets are
+# not re-trained on the next run
+TRAIN_CACHE_DIR = Path("models/.train_cache")
+
+# Libraries whose versions are part of the cache key: an upgrade may change
+# the fitted models or their pickles
+TRAIN_CACHE_LIBRARIES = ("pycaret", "sktime", "statsmodels", "scikit-learn")
+
+# Macro files above this many rows are read in batches, keeping only the
+# rows of the loaded series, so peak memory stays bounded as history grows
+MACRO_STREAM_MIN_ROWS = 5_000_000
+MACRO_BATCH_SIZE = 500_000
+
 # Slow models to exclude for speed
 SLOW_MODELS = [
     "prophet",  # Requires extra dependencies, slow
@@ -107,10 +127,15 @@ def load_asset_data(asset: str, macro_data: dict) -> pd.DataFrame:
     
     data = macro_data[series_key]
     
+    # _load_macro_data frames are already monthly [date, price_usd]
+    if isinstance(data, pd.DataFrame) and data.attrs.get("freq") == "MS":
+        return data
+    
     if isinstance(data, list):
         df = pd.DataFrame(data)
     elif isinstance(data, pd.DataFrame):
-        df = data.copy()
+        # Not mutated below (renames/assign return new frames)
+        df = data
     else:
         raise DataFetchError(
             source="macro_data",
@@ -127,16 +152,15 @@ def load_asset_data(asset: str, macro_data: dict) -> pd.DataFrame:
     if 'value' in df.columns:
         df = df.rename(columns={'value': 'price_usd'})
     
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date').reset_index(drop=True)
+    # Frames from _load_macro_data already hold timestamps; lists/strings are parsed
+    if not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df = df.assign(date=pd.to_datetime(df['date']))
+    df = df.sort_values('date')
     
-    # Aggregate to monthly
-    df['month'] = df['date'].dt.to_period('M')
-    df_monthly = df.groupby('month').agg({
-        'price_usd': 'last'
-    }).reset_index()
-    df_monthly['date'] = df_monthly['month'].dt.to_timestamp()
-    df_monthly = df_monthly.drop(columns=['month'])
+    # Aggregate to monthly: last price per month, labelled by month start;
+    # months without rows are dropped (all-NaN months are kept, as NaN)
+    monthly = df.set_index('date')['price_usd'].resample('MS')
+    df_monthly = monthly.last()[monthly.size() > 0].reset_index()
     
     return df_monthly[['date', 'price_usd']]
 
@@ -145,22 +169,49 @@ def load_asset_data(asset: str, macro_data: dict) -> pd.DataFrame:
 # Training Functions
 # ============================================
 
+@lru_cache(maxsize=1)
+def _library_versions() -> tuple:
+    """Installed versions of TRAIN_CACHE_LIBRARIES (None where not installed)."""
+    versions = []
+    for name in TRAIN_CACHE_LIBRARIES:
+        try:
+            versions.append((name, metadata.version(name)))
+        except metadata.PackageNotFoundError:
+            versions.append((name, None))
+    return tuple(versions)
+
+
+def _train_cache_path(asset: str, df_exp: pd.DataFrame, *settings) -> Path:
+    """Cache file for a training run: SHA1 of the indexed series, the settings and library versions."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df_exp, index=True).to_numpy().tobytes())
+    digest.update(repr((settings, FAST_MODELS, _library_versions())).encode())
+    return TRAIN_CACHE_DIR / f"{asset}_{digest.hexdigest()}.pkl"
+
+
+def _prune_train_cache(asset: str) -> None:
+    """Delete an asset's cached results (.pkl and buffer sidecars); only the newest is kept."""
+    for path in TRAIN_CACHE_DIR.glob(f"{asset}_*.pkl*"):
+        path.unlink(missing_ok=True)
+
+
 def train_asset_model(
     asset: str,
     df: pd.DataFrame,
     n_select: int = 3,
     cv_folds: int = 3,  # Reduced for speed
-    forecast_horizon: int = 1
+    forecast_horizon: int = 1,
+    n_jobs: int = -1
 ) -> dict:
     """
     Train and compare models for a single asset.
     
     Uses PyCaret with speed optimizations:
     - turbo=True (excludes slow models)
-    - n_jobs=-1 (parallel training)
+    - n_jobs=-1 (parallel training; lower it when several assets train at once)
     - Reduced CV folds
     
-    Returns dict with best model info and comparison results.
+    Returns dict with best model info and comparison results (picklable,
+    so it can come back from a worker process).
     """
     try:
         from pycaret.time_series import TSForecastingExperiment
@@ -175,9 +226,27 @@ def train_asset_model(
     start_time = datetime.now()
     
     try:
+        from app.ml.registry.artifacts import dump_model, load_model
+        
         # Prepare data - set date as index
         df_exp = df.set_index('date').sort_index()
         
+        # Same data, settings and libraries as a previous run: reuse its
+        # result. trained_at stays the original fit time; training_duration
+        # is this run's (load) time and 'cached' marks the reuse
+        cache_path = _train_cache_path(asset, df_exp, n_select, cv_folds, forecast_horizon)
+        if cache_path.exists():
+            try:
+                result = load_model(cache_path)
+                result.update(
+                    cached=True,
+                    training_duration=(datetime.now() - start_time).total_seconds()
+                )
+                logger.info("training_cache_hit", asset=asset, best_model=result["best_model"], trained_at=result["trained_at"])
+                return result
+            except Exception as e:
+                logger.warning("training_cache_unreadable", asset=asset, error=str(e))
+        
         # Initialize experiment
         exp = TSForecastingExperiment()
         
@@ -190,7 +259,7 @@ def train_asset_model(
             session_id=42,
             verbose=False,
             html=False,
-            n_jobs=-1  # Parallel training
+            n_jobs=n_jobs  # Parallel training
         )
         
         # Compare models with turbo mode (fast models only)
@@ -220,15 +289,17 @@ def train_asset_model(
             "mape": float(best_row.get('MAPE', 0)) if 'MAPE' in best_row else None
         }
         
-        # All model results for comparison chart
-        all_models = []
-        for idx, row in comparison_df.iterrows():
-            all_models.append({
-                "model": str(idx) if isinstance(idx, str) else row.get('Model', f'model_{idx}'),
-                "mae": float(row.get('MAE', 0)),
-                "rmse": float(row.get('RMSE', 0)),
-                "mape": float(row.get('MAPE', 0)) if 'MAPE' in row else None
-            })
+        # Model results for comparison chart (top 10), built column-wise:
+        # missing MAE/RMSE read as 0, missing MAPE as None
+        top = comparison_df.head(10)
+        metric_cols = top.reindex(columns=['MAE', 'RMSE'], fill_value=0).astype(float)
+        fallback_names = top['Model'] if 'Model' in top.columns else 'model_' + top.index.astype(str)
+        all_models = pd.DataFrame({
+            "model": np.where(top.index.map(lambda i: isinstance(i, str)), top.index, fallback_names),
+            "mae": metric_cols['MAE'].to_numpy(),
+            "rmse": metric_cols['RMSE'].to_numpy(),
+            "mape": top['MAPE'].astype(float).to_numpy() if 'MAPE' in top.columns else None
+        }).to_dict('records')
         
         duration = (datetime.now() - start_time).total_seconds()
         
@@ -240,19 +311,28 @@ def train_asset_model(
             duration_seconds=round(duration, 1)
         )
         
-        return {
+        result = {
             "asset": asset,
             "status": "success",
             "best_model": best_model_name,
             "metrics": metrics,
-            "all_models": all_models[:10],  # Top 10 for chart
+            "all_models": all_models,
             "training_duration": duration,
             "data_points": len(df),
             "trained_at": datetime.now().isoformat(),
-            "model_object": best_model,
-            "experiment": exp
+            "cached": False,
+            "model_object": best_model
         }
         
+        try:
+            TRAIN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _prune_train_cache(asset)
+            dump_model(result, cache_path)
+        except Exception as e:
+            logger.warning("training_cache_write_failed", asset=asset, error=str(e))
+        
+        return result
+        
     except Exception as e:
         logger.error("training_failed", asset=asset, error=str(e))
         return {
@@ -269,16 +349,20 @@ def train_all_assets_parallel(
     """
     Train models for all assets in parallel.
     
-    Uses ThreadPoolExecutor for concurrent training.
+    Uses ProcessPoolExecutor so model fitting runs on several cores instead
+    of contending for the GIL. Each worker gets an equal share of the cores
+    for PyCaret's n_jobs, so workers x n_jobs does not oversubscribe.
     Each asset gets its own optimal model.
     
     Returns dict with results per asset.
     """
     results = {}
+    n_jobs = max(1, (os.cpu_count() or 1) // max_workers)
     
     logger.info("parallel_training_started", assets=list(ASSETS_CONFIG.keys()))
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    # spawn: fresh interpreters, no forked copies of parent threads/locks
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn")) as executor:
         futures = {}
         
         for asset in ASSETS_CONFIG.keys():
@@ -293,7 +377,7 @@ def train_all_assets_parallel(
                     }
                     continue
                     
-                future = executor.submit(train_asset_model, asset, df)
+                future = executor.submit(train_asset_model, asset, df, n_jobs=n_jobs)
                 futures[future] = asset
                 
             except Exception as e:
@@ -424,7 +508,8 @@ def run_training_pipeline(macro_data: dict = None) -> dict:
     
     for asset, result in results.items():
         if result.get("status") == "success":
-            print(f"✅ {asset}: {result['best_model']} (MAE: {result['metrics']['mae']:.2f})")
+            cached = f", cached from {result['trained_at']}" if result.get("cached") else ""
+            print(f"✅ {asset}: {result['best_model']} (MAE: {result['metrics']['mae']:.2f}{cached})")
         else:
             print(f"❌ {asset}: {result.get('error', 'Unknown error')}")
     
@@ -440,8 +525,11 @@ def _load_macro_data() -> dict:
     The parquet has LONG format with columns:
         [date, value, series_id, source]
         
-    We filter by series_id and return a dict mapping
-    friendly names to DataFrames.
+    We filter by series_id and return a dict mapping friendly names to
+    monthly [date, price_usd] DataFrames (last price per month, labelled by
+    month start), ready for load_asset_data. The file is only re-read when
+    its mtime changes, so repeated pipeline runs share one dict: callers must not
+    mutate it or its frames.
     """
     from pathlib import Path
     
@@ -450,8 +538,12 @@ def _load_macro_data() -> dict:
     if not macro_path.exists():
         raise FileNotFoundError(f"Macro data not found at {macro_path}")
     
-    df = pd.read_parquet(macro_path)
-    
+    return _read_macro_data(str(macro_path), macro_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _read_macro_data(macro_path: str, mtime_ns: int) -> dict:
+    """Read the macro parquet for a given file version and split it into monthly series."""
     # Series ID mapping: series_id -> friendly name
     SERIES_MAPPING = {
         "GOLDAMGBD228NLBM": "gold",
@@ -466,29 +558,63 @@ def _load_macro_data() -> dict:
         "SOL-CLP": "sol",
     }
     
+    # Only read the columns and series we load (row groups of other series
+    # are skipped by the pyarrow reader), then split by series in one pass
+    df = _read_macro_rows(macro_path, list(SERIES_MAPPING))
+    # run_pipeline writes 'date' as a timestamp; only older files need parsing
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"])
+    
+    # Monthly aggregation for every series in one groupby: last non-null
+    # value per (series, month start); months without values are dropped
+    df = df.dropna(subset=["value"]).sort_values(["series_id", "date"], kind="stable")
+    month_start = df["date"].to_numpy().astype("datetime64[M]").astype(df["date"].dtype)
+    monthly = (
+        df.assign(date=month_start)
+          .groupby(["series_id", "date"], observed=True)["value"].last()
+          .rename("price_usd")
+          .reset_index()
+    )
+    groups = dict(tuple(monthly.groupby("series_id", sort=False, observed=True)))
+    
     macro_data = {}
     
     for series_id, friendly_name in SERIES_MAPPING.items():
-        # Filter to this series
-        series_df = df[df["series_id"] == series_id].copy()
+        series_df = groups.get(series_id)
         
-        if series_df.empty:
+        if series_df is None:
             logger.warning("series_not_found", series_id=series_id)
             continue
         
-        # Prepare DataFrame with expected columns
-        series_df = series_df[["date", "value"]].copy()
-        series_df = series_df.rename(columns={"value": "price_usd"})
-        series_df["date"] = pd.to_datetime(series_df["date"])
-        series_df = series_df.sort_values("date").reset_index(drop=True)
-        series_df = series_df.dropna(subset=["price_usd"])
+        # Marked monthly so load_asset_data returns it as-is
+        series_df = series_df[["date", "price_usd"]].reset_index(drop=True)
+        series_df.attrs["freq"] = "MS"
         
         macro_data[friendly_name] = series_df
-        logger.info("series_loaded", series=friendly_name, rows=len(series_df))
+        logger.info("series_loaded", series=friendly_name, months=len(series_df))
     
     return macro_data
 
 
+def _read_macro_rows(macro_path: str, series_ids: list) -> pd.DataFrame:
+    """[series_id, date, value] rows of the given series, streamed in batches for large files."""
+    columns = ["series_id", "date", "value"]
+    pf = pq.ParquetFile(macro_path)
+    
+    if pf.metadata.num_rows <= MACRO_STREAM_MIN_ROWS:
+        return pd.read_parquet(macro_path, columns=columns, filters=[("series_id", "in", series_ids)])
+    
+    # Only one unfiltered batch is decoded at a time; the matching rows are
+    # kept and concatenated once at the end (series are split downstream)
+    wanted = pa.array(series_ids)
+    parts = []
+    for batch in pf.iter_batches(batch_size=MACRO_BATCH_SIZE, columns=columns):
+        keep = pc.is_in(batch.column("series_id").cast(pa.string()), value_set=wanted)
+        parts.append(batch.filter(keep))
+    
+    return pa.Table.from_batches(parts).to_pandas()
+
+
 
 # ============================================
 # CLI